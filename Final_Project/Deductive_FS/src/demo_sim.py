@@ -1,4 +1,6 @@
-from simulation import Simulation
+from simulation import Simulation, fault_simulation_engines
+from parallel_simulation import ParallelSimulation
+from result_writer import result_formats
 import argparse
 
 if __name__ == "__main__":
@@ -8,6 +10,14 @@ if __name__ == "__main__":
     parser.add_argument("--output", type=str, required=True, help="Output filepath")
     parser.add_argument("--faults", type=str, required=False, default=None, help="Faults filepath")
     parser.add_argument("--cumulative", action="store_true", help="Whether to do cumulative fault simulations")
+    parser.add_argument("--drop_faults", action="store_true", help="Whether to stop simulating faults already detected in cumulative fault simulations")
+    parser.add_argument("--collapse", type=str, choices=["equivalence"], default=None, help="Whether to simulate only representative faults after equivalence fault collapsing")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes sharing the fault list")
+    parser.add_argument("--format", type=str, choices=result_formats, default="text", help="Format of results written into output file")
+    parser.add_argument("--delta", action="store_true", help="Whether to list only newly detected faults for each input vector in cumulative fault simulations")
+    parser.add_argument("--use_cache", action="store_true", help="Whether to load compiled netlist cached next to netlist file (compiling and caching it if needed)")
+    # Critical path tracing is left out since it is still slower than deductive fault simulation
+    parser.add_argument("--engine", type=str, choices=[engine for engine in fault_simulation_engines if engine != "critical_path"], default="deductive", help="Fault simulation engine")
 
     arguments = parser.parse_args()
 
@@ -18,10 +28,23 @@ if __name__ == "__main__":
     fault_sim_inputs = arguments.inputs
     fault_sim_output_filepath = arguments.output
     is_cumulative = arguments.cumulative
+    fault_sim_engine = arguments.engine
+    is_fault_dropping_enabled = arguments.drop_faults
+    fault_collapsing = arguments.collapse
+    num_workers = arguments.workers
+    output_format = arguments.format
+    is_delta_only = arguments.delta
+    use_cache = arguments.use_cache
 
-    sim = Simulation()
+    if num_workers > 1:
+        with ParallelSimulation(netlist_filepath, fault_sim_faults_filepath, fault_collapsing != None, num_workers, use_cache) as parallel_sim:
+            parallel_sim.open_result_writer(fault_sim_output_filepath, output_format, is_delta_only)
+            parallel_sim.run_fault_simulations_with_inputs(fault_sim_inputs, not is_cumulative, circuit_name, fault_sim_output_filepath, fault_sim_engine, is_fault_dropping_enabled)
+    else:
+        sim = Simulation()
 
-    sim.build_netlist_from_file(netlist_filepath)
-    sim.place_stuck_at_faults(fault_sim_faults_filepath)
-    for fault_sim_input in fault_sim_inputs:
-        sim.run_fault_simulation_with_input(fault_sim_input, not is_cumulative, circuit_name, fault_sim_output_filepath)
\ No newline at end of file
+        sim.build_netlist_from_file(netlist_filepath, use_cache)
+        sim.place_stuck_at_faults(fault_sim_faults_filepath, fault_collapsing != None)
+        sim.open_result_writer(fault_sim_output_filepath, output_format, is_delta_only)
+        sim.run_fault_simulations_with_inputs(fault_sim_inputs, not is_cumulative, circuit_name, fault_sim_output_filepath, fault_sim_engine, is_fault_dropping_enabled)
+        sim.close_result_writer()
\ No newline at end of file
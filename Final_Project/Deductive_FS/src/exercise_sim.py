@@ -1,10 +1,21 @@
 from simulation import Simulation
+from profiler import Profiler
+import argparse
 import random
 import matplotlib.pyplot as plt
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", type=str, nargs="?", const="../test_files/sim_profile.json", default=None, help="Whether to profile simulations, writing profile (JSON) into filepath given or ../test_files/sim_profile.json")
+    arguments = parser.parse_args()
+
     sim = Simulation()
     random_gen = random.Random(5)
+    profiler = None
+    if arguments.profile != None:
+        profiler = Profiler()
+        sim.profiler = profiler
+        profiler.start()
 
     scenarios = ["s27", "s298f_2", "s344f_2", "s349f_2"]
     fault_simulation_input_vectors = {
@@ -44,7 +55,7 @@ if __name__ == "__main__":
         fault_coverages = []
         for i in num_tests_range:
             random_test_vector = ''.join(random_gen.choice("01") for _ in range(input_vector_size))
-            detected_faults = sim.run_fault_simulation_with_input(random_test_vector, False, f"{sim_scenario}.txt")
+            detected_faults = sim.run_fault_simulation_with_input(random_test_vector, False, f"{sim_scenario}.txt", drop_detected_faults=True)
             fault_coverages.append(len(detected_faults) / num_faults * 100)
         
         print("Completed running fault simlations with random test vectors")
@@ -57,4 +68,11 @@ if __name__ == "__main__":
         plt.ylabel("Fault coverage (%)")
         plt.title(f"Fault coverage vs. Number of random test vectors for circuit {sim_scenario}.txt")
         plt.grid(True)
+
+    if profiler != None:
+        profiler.stop()
+        print("----------------------------------------")
+        profiler.print_summary()
+        profiler.write_json(arguments.profile)
+        print(f"Profile written into {arguments.profile}")
     plt.show()
\ No newline at end of file
@@ -1,52 +1,522 @@
-from gate import Gate, GateType
-from net import Net
+import hashlib
+import math
+import os
+import struct
+import sys
+from array import array
+from collections import deque
+from collections.abc import Mapping, Sequence
+from gate import GateType, gates_with_inversion
+from compact_netlist import CompactNetlist, GateOperation, gate_types, gate_operations_by_type, controlling_values_by_operation
+from profiler import Profiler, profile_phase
 
+# Compiled netlists with another version are ignored and rebuilt
+compiled_netlist_magic = b"DFSN"
+compiled_netlist_version = 2
+
+# Arrays of compiled netlist in the order they are written into compiled netlist file
+compiled_netlist_fields = ["net_names", "input_net_ids", "output_net_ids", "gate_type_codes", "out_net_ids", "fanin_offsets", "fanin_net_ids",
+    "fanout_offsets", "fanout_gate_ids", "levels", "levelized_gate_ids", "controllabilities", "observabilities"]
+
+# Gate identifiers in netlist files, and in ISCAS .bench files which also name inverters NOT and buffers BUFF
+gate_types_by_identifier = {gate_type.value: gate_type for gate_type in GateType}
+bench_gate_types_by_identifier = {**gate_types_by_identifier, "NOT": GateType.INV, "BUFF": GateType.BUF}
+
+gate_type_codes_by_type = {gate_type: gate_type_code for (gate_type_code, gate_type) in enumerate(gate_types)}
+gate_operations_by_code = [gate_operations_by_type[gate_type] for gate_type in gate_types]
+
+# Net names are integers, except in .bench files naming nets otherwise (such as G0 in ISCAS-89 circuits)
+def parse_net_name(token: str):
+    return int(token) if token.isdigit() else token
+
+# Split "IDENTIFIER(a, b, ...)" of .bench file into identifier and list of arguments
+def split_bench_call(expression: str, line_number: int):
+    open_index = expression.find("(")
+    close_index = expression.rfind(")")
+    if (open_index < 0 or close_index < open_index):
+        raise ValueError(f"Line {line_number}: expected IDENTIFIER(...) but found {expression.strip()}")
+    arguments = [argument.strip() for argument in expression[open_index + 1:close_index].split(",")]
+    return (expression[:open_index].strip().upper(), [argument for argument in arguments if len(argument) > 0])
+
+# Net names of netlist files are integers, kept in an array (a tenth of the memory of a list of integers)
+# unless some net name is not an integer, as in .bench files
+def compact_net_names(net_names: list):
+    if all(type(net_name) == int for net_name in net_names):
+        try:
+            return array("q", net_names)
+        except OverflowError:
+            pass
+    return net_names
+
+# Compiled netlist is cached next to netlist file
+def get_compiled_netlist_filepath(netlist_filepath: str):
+    return f"{netlist_filepath}.compiled"
+
+# Header of compiled netlist file: magic, version, byte order of arrays and hash of netlist file content compiled
+# Compiled netlist file is only read past its header if the header is exactly the expected one
+def get_compiled_netlist_header(content_hash: str):
+    return compiled_netlist_magic + struct.pack("<I", compiled_netlist_version) + sys.byteorder[0].encode("ascii") + content_hash.encode("ascii")
+
+# Each array is written as its typecode, item size and length, then its items as raw machine values starting at a multiple of 8 bytes,
+# so arrays can be read with array.fromfile (or mapped into memory) without decoding
+# Net names that are not all integers are written as a string table instead (typecode "s"): names separated by newlines, encoded in UTF-8
+def write_compiled_array(file, values):
+    if isinstance(values, list):
+        data = "\n".join(str(value) for value in values).encode("utf-8")
+        file.write(struct.pack("<cBQ", b"s", 1, len(data)))
+        file.write(bytes(-file.tell() % 8))
+        file.write(data)
+        return
+    if not isinstance(values, array):
+        values = array("B", values)
+    file.write(struct.pack("<cBQ", values.typecode.encode("ascii"), values.itemsize, len(values)))
+    file.write(bytes(-file.tell() % 8))
+    values.tofile(file)
+
+# Array written by write_compiled_array, raising EOFError if file ends before it and ValueError if it cannot be read on this machine
+def read_compiled_array(file, file_size: int):
+    (typecode, itemsize, length) = struct.unpack("<cBQ", file.read(struct.calcsize("<cBQ")))
+    file.seek(-file.tell() % 8, os.SEEK_CUR)
+    if (length * itemsize > file_size - file.tell()):
+        raise EOFError("Compiled netlist file is truncated")
+    if typecode == b"s":
+        data = file.read(length).decode("utf-8")
+        return [parse_net_name(net_name) for net_name in data.split("\n")] if length > 0 else []
+    values = array(typecode.decode("ascii"))
+    if values.itemsize != itemsize:
+        raise ValueError(f"Item size of array with typecode {values.typecode} is {values.itemsize}, not {itemsize}")
+    values.fromfile(file, length)
+    return values
+
+# List of Net or Gate views of compact netlist, one for each ID of ids, made when accessed
+class NetlistView(Sequence):
+    def __init__(self, ids, get_view):
+        self.ids = ids
+        self.get_view = get_view
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.get_view(view_id) for view_id in self.ids[index]]
+        return self.get_view(self.ids[index])
+
+# Mapping from net names to Net views of compact netlist, in order of net IDs
+class NetsByName(Mapping):
+    def __init__(self, compact_netlist: CompactNetlist):
+        self.compact_netlist = compact_netlist
+
+    def __getitem__(self, net_name):
+        net_id = self.compact_netlist.get_net_id(net_name)
+        if net_id == None:
+            raise KeyError(net_name)
+        return self.compact_netlist.get_net(net_id)
+
+    def __iter__(self):
+        return iter(self.compact_netlist.net_names)
+
+    def __len__(self):
+        return self.compact_netlist.num_nets
+
+# Netlist files are parsed straight into arrays of compact netlist, which is the only store of netlist
+# Nets, gates, input nets and output nets are given as views of it, made only when looked at
 class Netlist:
-    def __init__(self):
-        self.gates = []
-        self.input_nets = []
-        self.output_nets = []
-        self.nets_by_name = {}
+    # If profiler is specified, time parsing and levelization of netlist built from file
+    def __init__(self, profiler: Profiler = None):
+        self.profiler = profiler
+        self.compact_netlist = None
+        self.reset_parsed_netlist()
+
+    # Arrays filled while parsing netlist file, handed over to compact netlist once parsing is done
+    def reset_parsed_netlist(self):
+        self.net_ids_by_name = {}
+        self.net_names = []
+        self.src_gate_ids = array("i")
+        self.input_net_ids = array("i")
+        self.output_net_ids = array("i")
+        self.gate_type_codes = bytearray()
+        self.out_net_ids = array("i")
+        self.fanin_offsets = array("i", [0])
+        self.fanin_net_ids = array("i")
+
+    @property
+    def nets_by_name(self):
+        return NetsByName(self.compact_netlist) if self.compact_netlist != None else {}
+
+    @property
+    def gates(self):
+        return NetlistView(range(self.compact_netlist.num_gates), self.compact_netlist.get_gate) if self.compact_netlist != None else []
+
+    @property
+    def levelized_gates(self):
+        return NetlistView(self.compact_netlist.levelized_gate_ids, self.compact_netlist.get_gate) if self.compact_netlist != None else []
+
+    @property
+    def input_nets(self):
+        return NetlistView(self.compact_netlist.input_net_ids, self.compact_netlist.get_net) if self.compact_netlist != None else []
 
-    def add_line_info(self, line_info: list[str]):
+    @property
+    def output_nets(self):
+        return NetlistView(self.compact_netlist.output_net_ids, self.compact_netlist.get_net) if self.compact_netlist != None else []
+
+    # ID of net, nets being numbered in order of first appearance in netlist file
+    def add_net(self, net_name):
+        net_id = self.net_ids_by_name.get(net_name)
+        if net_id == None:
+            net_id = len(self.net_names)
+            self.net_ids_by_name[net_name] = net_id
+            self.net_names.append(net_name)
+            self.src_gate_ids.append(-1)
+        return net_id
+
+    def add_gate(self, gate_type: GateType, in_net_names: list, out_net_name, line_number: int = None):
+        if len(in_net_names) == 0:
+            raise ValueError(f"Line {line_number}: gate driving net {out_net_name} has no input net")
+        in_net_ids = [self.add_net(in_net_name) for in_net_name in in_net_names]
+
+        out_net_id = self.add_net(out_net_name)
+        if self.src_gate_ids[out_net_id] != -1:
+            raise ValueError(f"Line {line_number}: net {out_net_name} is driven by more than one gate")
+        self.src_gate_ids[out_net_id] = len(self.out_net_ids)
+
+        self.gate_type_codes.append(gate_type_codes_by_type[gate_type])
+        self.out_net_ids.append(out_net_id)
+        self.fanin_net_ids.extend(in_net_ids)
+        self.fanin_offsets.append(len(self.fanin_net_ids))
+
+    # Line of netlist file: "INPUT <nets> -1", "OUTPUT <nets> -1" or "<gate type> <input nets> <output net>"
+    def add_line_info(self, line_info: list[str], line_number: int = None):
         identifier = line_info[0]
-        match identifier:
-            case "INPUT":
-                for i in range(1, len(line_info) - 1):
-                    net_name = int(line_info[i])
-                    in_net = self.nets_by_name.setdefault(net_name, Net(net_name))
-                    self.input_nets.append(in_net)
-            case "OUTPUT":
-                for i in range(1, len(line_info) - 1):
-                    net_name = int(line_info[i])
-                    out_net = self.nets_by_name.setdefault(net_name, Net(net_name))
-                    self.output_nets.append(out_net)
-            case _:
-                try:
-                    current_gate = Gate(GateType[identifier])
-
-                    in_nets = []
-                    for i in range(1, len(line_info) - 1):
-                        in_net_name = int(line_info[i])
-                        in_net = self.nets_by_name.setdefault(in_net_name, Net(in_net_name))
-                        in_net.des_gates.append(current_gate)
-                        in_nets.append(in_net)
-                    
-                    out_net_name = int(line_info[len(line_info) - 1])
-                    out_net = self.nets_by_name.setdefault(out_net_name, Net(out_net_name))
-                    out_net.src_gate = current_gate
-
-                    current_gate.set_connecting_nets(in_nets, out_net)
-                    self.gates.append(current_gate)
-
-                except ValueError:
-                    print("Unknown identifier")
-
-    def build_from_file(self, netlist_filepath: str):
-        with open(netlist_filepath, "r") as file:
-            print(f"\nStart building netlist from file {netlist_filepath}")
-            for line in file:
-                line_info = line.strip().split()
-                if (len(line_info) > 0):
-                    self.add_line_info(line_info)
-            print("Completed building netlist\n\n")
\ No newline at end of file
+        try:
+            net_names = [int(token) for token in line_info[1:]]
+        except ValueError:
+            raise ValueError(f"Line {line_number}: invalid net name in {" ".join(line_info)}") from None
+
+        if identifier == "INPUT":
+            self.input_net_ids.extend(self.add_net(net_name) for net_name in net_names[:-1])
+        elif identifier == "OUTPUT":
+            self.output_net_ids.extend(self.add_net(net_name) for net_name in net_names[:-1])
+        else:
+            gate_type = gate_types_by_identifier.get(identifier)
+            if gate_type == None:
+                raise ValueError(f"Line {line_number}: unknown identifier {identifier}")
+            if len(net_names) == 0:
+                raise ValueError(f"Line {line_number}: gate has no output net")
+            self.add_gate(gate_type, net_names[:-1], net_names[-1], line_number)
+
+    # Line of ISCAS-85/89 .bench file: "INPUT(a)", "OUTPUT(a)" or "b = GATE(a1, a2, ...)", with comments starting with #
+    # Flip-flops "b = DFF(a)" are cut as in full-scan test: b becomes input net and a becomes output net
+    def add_bench_line(self, line: str, line_number: int = None):
+        line = line.split("#", 1)[0].strip()
+        if len(line) == 0:
+            return
+
+        if "=" not in line:
+            (identifier, arguments) = split_bench_call(line, line_number)
+            if (identifier not in ["INPUT", "OUTPUT"] or len(arguments) != 1):
+                raise ValueError(f"Line {line_number}: expected INPUT(net) or OUTPUT(net) but found {line}")
+            net_id = self.add_net(parse_net_name(arguments[0]))
+            (self.input_net_ids if identifier == "INPUT" else self.output_net_ids).append(net_id)
+            return
+
+        (out_token, expression) = line.split("=", 1)
+        out_net_name = parse_net_name(out_token.strip())
+        (identifier, arguments) = split_bench_call(expression, line_number)
+        in_net_names = [parse_net_name(argument) for argument in arguments]
+        if identifier == "DFF":
+            if len(in_net_names) != 1:
+                raise ValueError(f"Line {line_number}: flip-flop driving net {out_net_name} must have exactly one input net")
+            self.input_net_ids.append(self.add_net(out_net_name))
+            self.output_net_ids.append(self.add_net(in_net_names[0]))
+            return
+
+        gate_type = bench_gate_types_by_identifier.get(identifier)
+        if gate_type == None:
+            raise ValueError(f"Line {line_number}: unknown gate type {identifier}")
+        self.add_gate(gate_type, in_net_names, out_net_name, line_number)
+
+    # Parse netlist file line by line (as .bench file if its extension is .bench), then levelize and compute testability measures
+    def parse_file(self, netlist_filepath: str):
+        is_bench_file = netlist_filepath.lower().endswith(".bench")
+        self.reset_parsed_netlist()
+        with profile_phase(self.profiler, "parse"), open(netlist_filepath, "r") as file:
+            try:
+                for (line_number, line) in enumerate(file, 1):
+                    if is_bench_file:
+                        self.add_bench_line(line, line_number)
+                    else:
+                        line_info = line.split()
+                        if (len(line_info) > 0):
+                            self.add_line_info(line_info, line_number)
+            except ValueError as exception:
+                raise ValueError(f"{netlist_filepath}: {exception}") from None
+            compiled_netlist = self.compile_parsed_netlist()
+        with profile_phase(self.profiler, "levelize"):
+            self.levelize(compiled_netlist)
+            self.compute_testability(compiled_netlist)
+        # Mapping from net names to net IDs used while parsing is dropped, compact netlist building it again only once a net is looked up by name
+        self.compact_netlist = CompactNetlist(compiled_netlist)
+        self.reset_parsed_netlist()
+
+    # Arrays parsed from netlist file, with fanout of each net gathered from fanin of gates (gates reading a net in file order)
+    def compile_parsed_netlist(self):
+        (fanin_offsets, fanin_net_ids) = (self.fanin_offsets, self.fanin_net_ids)
+        num_nets = len(self.net_names)
+
+        fanout_offsets = array("i", [0]) * (num_nets + 1)
+        for in_net_id in fanin_net_ids:
+            fanout_offsets[in_net_id + 1] += 1
+        for net_id in range(num_nets):
+            fanout_offsets[net_id + 1] += fanout_offsets[net_id]
+        fanout_gate_ids = array("i", [0]) * len(fanin_net_ids)
+        next_positions = fanout_offsets[:num_nets]
+        for gate_id in range(len(self.out_net_ids)):
+            for i in range(fanin_offsets[gate_id], fanin_offsets[gate_id + 1]):
+                in_net_id = fanin_net_ids[i]
+                fanout_gate_ids[next_positions[in_net_id]] = gate_id
+                next_positions[in_net_id] += 1
+
+        return {
+            "net_names": compact_net_names(self.net_names),
+            "input_net_ids": self.input_net_ids,
+            "output_net_ids": self.output_net_ids,
+            "gate_type_codes": bytes(self.gate_type_codes),
+            "out_net_ids": self.out_net_ids,
+            "fanin_offsets": fanin_offsets,
+            "fanin_net_ids": fanin_net_ids,
+            "fanout_offsets": fanout_offsets,
+            "fanout_gate_ids": fanout_gate_ids
+        }
+
+    # If use_cache is specified, load compiled netlist cached next to netlist file if it was compiled from the same file content,
+    # otherwise build netlist from file and cache compiled netlist for next time
+    def build_from_file(self, netlist_filepath: str, use_cache: bool = False):
+        content_hash = None
+        if use_cache:
+            with open(netlist_filepath, "rb") as file:
+                content_hash = hashlib.sha256(file.read()).hexdigest()
+            with profile_phase(self.profiler, "parse"):
+                is_loaded = self.load_compiled(get_compiled_netlist_filepath(netlist_filepath), content_hash)
+            if is_loaded:
+                print(f"\nLoaded compiled netlist of file {netlist_filepath}\n\n")
+                return
+
+        print(f"\nStart building netlist from file {netlist_filepath}")
+        self.parse_file(netlist_filepath)
+        print("Completed building netlist\n\n")
+
+        if use_cache:
+            self.save_compiled(get_compiled_netlist_filepath(netlist_filepath), content_hash)
+
+    # Arrays of compact netlist, which compiled netlist file keeps
+    def compile(self):
+        compact_netlist = self.compact_netlist
+        return {
+            "net_names": compact_netlist.net_names,
+            "input_net_ids": compact_netlist.input_net_ids,
+            "output_net_ids": compact_netlist.output_net_ids,
+            "gate_type_codes": compact_netlist.gate_type_codes,
+            "out_net_ids": compact_netlist.out_net_ids,
+            "fanin_offsets": compact_netlist.fanin_offsets,
+            "fanin_net_ids": compact_netlist.fanin_net_ids,
+            "fanout_offsets": compact_netlist.fanout_offsets,
+            "fanout_gate_ids": compact_netlist.fanout_gate_ids,
+            "levels": compact_netlist.levels,
+            "levelized_gate_ids": compact_netlist.levelized_gate_ids,
+            "controllabilities": compact_netlist.controllabilities,
+            "observabilities": compact_netlist.observabilities
+        }
+
+    # Compact netlist which simulation engines and test generation run on, and which Net and Gate objects are views of
+    def get_compact_netlist(self):
+        return self.compact_netlist
+
+    # Return whether compiled netlist file exists and was compiled from netlist file content with content_hash
+    # Header is checked before anything else of the file is read, and arrays are read as raw machine values, never unpickled
+    def load_compiled(self, compiled_netlist_filepath: str, content_hash: str):
+        header = get_compiled_netlist_header(content_hash)
+        try:
+            with open(compiled_netlist_filepath, "rb") as compiled_netlist_file:
+                if compiled_netlist_file.read(len(header)) != header:
+                    return False
+                file_size = os.fstat(compiled_netlist_file.fileno()).st_size
+                compiled_netlist = {field: read_compiled_array(compiled_netlist_file, file_size) for field in compiled_netlist_fields}
+                if len(compiled_netlist_file.read(1)) > 0:
+                    return False
+        except (OSError, EOFError, ValueError, struct.error):
+            return False
+        compiled_netlist["gate_type_codes"] = bytes(compiled_netlist["gate_type_codes"])
+        self.compact_netlist = CompactNetlist(compiled_netlist)
+        return True
+
+    # Write into temporary file first, so processes building the same netlist at once never load a partly written file
+    def save_compiled(self, compiled_netlist_filepath: str, content_hash: str):
+        temporary_filepath = f"{compiled_netlist_filepath}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_filepath, "wb") as compiled_netlist_file:
+                compiled_netlist_file.write(get_compiled_netlist_header(content_hash))
+                compiled_netlist = self.compile()
+                for field in compiled_netlist_fields:
+                    write_compiled_array(compiled_netlist_file, compiled_netlist[field])
+            os.replace(temporary_filepath, compiled_netlist_filepath)
+        except OSError as exception:
+            print(f"Could not cache compiled netlist: {exception}")
+
+    # Compute topological order of gates once, so simulations can evaluate gates in this fixed order
+    def levelize(self, compiled_netlist: dict):
+        (fanin_offsets, fanin_net_ids, fanout_offsets, fanout_gate_ids, out_net_ids) = (compiled_netlist["fanin_offsets"], compiled_netlist["fanin_net_ids"],
+            compiled_netlist["fanout_offsets"], compiled_netlist["fanout_gate_ids"], compiled_netlist["out_net_ids"])
+        src_gate_ids = self.src_gate_ids
+        num_gates = len(out_net_ids)
+
+        # Count number of input nets driven by a gate that has not been ordered yet, indexed by gate ID
+        # Level of each gate is raised by every ordered gate driving it, so it is final once the gate becomes ready
+        pending_in_nets_counts = array("i", [0]) * num_gates
+        levels = array("i", [1]) * num_gates
+        ready_gate_ids = deque()
+        for gate_id in range(num_gates):
+            pending_in_nets_count = 0
+            for i in range(fanin_offsets[gate_id], fanin_offsets[gate_id + 1]):
+                if (src_gate_ids[fanin_net_ids[i]] != -1):
+                    pending_in_nets_count += 1
+            pending_in_nets_counts[gate_id] = pending_in_nets_count
+            if (pending_in_nets_count == 0):
+                ready_gate_ids.append(gate_id)
+
+        ordered_gate_ids = array("i")
+        while len(ready_gate_ids) > 0:
+            gate_id = ready_gate_ids.popleft()
+            ordered_gate_ids.append(gate_id)
+            des_level = levels[gate_id] + 1
+            out_net_id = out_net_ids[gate_id]
+            for i in range(fanout_offsets[out_net_id], fanout_offsets[out_net_id + 1]):
+                des_gate_id = fanout_gate_ids[i]
+                if (levels[des_gate_id] < des_level):
+                    levels[des_gate_id] = des_level
+                pending_in_nets_counts[des_gate_id] -= 1
+                if (pending_in_nets_counts[des_gate_id] == 0):
+                    ready_gate_ids.append(des_gate_id)
+
+        # Gates that were never ordered are on (or fed by) a combinational loop
+        if (len(ordered_gate_ids) != num_gates):
+            looped_nets = sorted(self.net_names[out_net_ids[gate_id]] for gate_id in range(num_gates) if pending_in_nets_counts[gate_id] > 0)
+            raise ValueError(f"Combinational loop detected through nets {looped_nets}")
+
+        compiled_netlist["levels"] = levels
+        compiled_netlist["levelized_gate_ids"] = array("i", sorted(ordered_gate_ids, key = lambda gate_id: levels[gate_id]))
+
+    # Compute SCOAP controllabilities and observabilities of nets once, so test generation can use them as guidance
+    # Nets not driven by any gate count as input nets, nets that reach no output net are unobservable (infinite observability)
+    # Controllabilities of net n are controllabilities[2 * n] (CC0) and controllabilities[2 * n + 1] (CC1)
+    def compute_testability(self, compiled_netlist: dict):
+        (fanin_offsets, fanin_net_ids, out_net_ids, gate_type_codes, levelized_gate_ids) = (compiled_netlist["fanin_offsets"], compiled_netlist["fanin_net_ids"],
+            compiled_netlist["out_net_ids"], compiled_netlist["gate_type_codes"], compiled_netlist["levelized_gate_ids"])
+        num_nets = len(self.net_names)
+        controllabilities = array("d", [1]) * (2 * num_nets)
+        observabilities = array("d", [math.inf]) * num_nets
+
+        gate_inversions = [gate_type in gates_with_inversion for gate_type in gate_types]
+        for gate_id in levelized_gate_ids:
+            gate_type_code = gate_type_codes[gate_id]
+            fanin = fanin_net_ids[fanin_offsets[gate_id]:fanin_offsets[gate_id + 1]]
+            match gate_operations_by_code[gate_type_code]:
+                case GateOperation.BUF:
+                    (cc0, cc1) = (controllabilities[2 * fanin[0]], controllabilities[2 * fanin[0] + 1])
+                case GateOperation.AND:
+                    cc0 = min(controllabilities[2 * in_net_id] for in_net_id in fanin)
+                    cc1 = sum(controllabilities[2 * in_net_id + 1] for in_net_id in fanin)
+                case GateOperation.OR:
+                    cc0 = sum(controllabilities[2 * in_net_id] for in_net_id in fanin)
+                    cc1 = min(controllabilities[2 * in_net_id + 1] for in_net_id in fanin)
+                case GateOperation.XOR:
+                    # Cheapest way to get even (cc0) or odd (cc1) parity over input nets seen so far
+                    (cc0, cc1) = (0, math.inf)
+                    for in_net_id in fanin:
+                        (in_cc0, in_cc1) = (controllabilities[2 * in_net_id], controllabilities[2 * in_net_id + 1])
+                        (cc0, cc1) = (min(cc0 + in_cc0, cc1 + in_cc1), min(cc0 + in_cc1, cc1 + in_cc0))
+            if gate_inversions[gate_type_code]:
+                (cc0, cc1) = (cc1, cc0)
+            out_net_id = out_net_ids[gate_id]
+            controllabilities[2 * out_net_id] = cc0 + 1
+            controllabilities[2 * out_net_id + 1] = cc1 + 1
+
+        # Going from the highest level, observability of gate's output net is final before gate is visited
+        # Observability of an input net through gate adds the cost of setting every other input net to non-controlling value
+        # (to any value for XOR and XNOR gates)
+        for output_net_id in compiled_netlist["output_net_ids"]:
+            observabilities[output_net_id] = 0
+        for gate_id in reversed(levelized_gate_ids):
+            operation = gate_operations_by_code[gate_type_codes[gate_id]]
+            fanin = fanin_net_ids[fanin_offsets[gate_id]:fanin_offsets[gate_id + 1]]
+            if (operation == GateOperation.XOR):
+                setting_costs = [min(controllabilities[2 * in_net_id], controllabilities[2 * in_net_id + 1]) for in_net_id in fanin]
+            else:
+                noncontrolling_value = 1 - controlling_values_by_operation[operation][0]
+                setting_costs = [controllabilities[2 * in_net_id + noncontrolling_value] for in_net_id in fanin]
+            out_net_observability = observabilities[out_net_ids[gate_id]] + 1 + sum(setting_costs)
+            for (in_net_id, setting_cost) in zip(fanin, setting_costs):
+                observabilities[in_net_id] = min(observabilities[in_net_id], out_net_observability - setting_cost)
+
+        compiled_netlist["controllabilities"] = controllabilities
+        compiled_netlist["observabilities"] = observabilities
+
+    # Structural fault collapsing over stuck-at faults (every stuck-at fault of every net if faults is not specified)
+    # Return representative faults and mapping from each fault to its representative fault
+    # Stuck-at faults are placed on whole nets, so faults across a gate are only equivalent if gate's input net feeds nothing else
+    # With dominance, a gate's output fault is represented by an input fault whose tests always detect it, which only reduces faults to target
+    # in test generation: fault simulation must keep dominating faults, since a dominated fault may be undetectable while its dominating fault is not
+    def collapse_faults(self, faults: list[tuple[int, int]] = None, use_dominance: bool = False):
+        compact_netlist = self.compact_netlist
+        net_names = compact_netlist.net_names
+        if faults == None:
+            faults = [(net_name, stuck_at_value) for net_name in net_names for stuck_at_value in [0, 1]]
+        parent_faults = {fault: fault for fault in faults}
+
+        def find_root(fault):
+            while parent_faults[fault] != fault:
+                parent_faults[fault] = parent_faults[parent_faults[fault]]
+                fault = parent_faults[fault]
+            return fault
+
+        def merge(fault_a, fault_b):
+            if fault_a in parent_faults and fault_b in parent_faults:
+                (root_a, root_b) = sorted([find_root(fault_a), find_root(fault_b)])
+                parent_faults[root_b] = root_a
+
+        (fanout_offsets, gate_operations, gate_inversions) = (compact_netlist.fanout_offsets, compact_netlist.gate_operations, compact_netlist.gate_inversions)
+        is_output_net = bytearray(compact_netlist.num_nets)
+        for output_net_id in compact_netlist.output_net_ids:
+            is_output_net[output_net_id] = 1
+        dominating_faults = []
+        for (gate_id, out_net_id) in enumerate(compact_netlist.out_net_ids):
+            out_net_name = net_names[out_net_id]
+            has_inversion = gate_inversions[gate_id]
+            for in_net_id in compact_netlist.get_fanin(gate_id):
+                if (fanout_offsets[in_net_id + 1] - fanout_offsets[in_net_id] != 1 or is_output_net[in_net_id]):
+                    continue
+                in_net_name = net_names[in_net_id]
+                match gate_operations[gate_id]:
+                    case GateOperation.BUF:
+                        for stuck_at_value in [0, 1]:
+                            merge((in_net_name, stuck_at_value), (out_net_name, stuck_at_value ^ has_inversion))
+                    case GateOperation.AND | GateOperation.OR:
+                        controlling_value = controlling_values_by_operation[gate_operations[gate_id]][0]
+                        merge((in_net_name, controlling_value), (out_net_name, controlling_value ^ has_inversion))
+                        # Any test for input stuck at non-controlling value also detects output stuck at the same (possibly inverted) value
+                        dominating_faults.append(((out_net_name, (controlling_value ^ 1) ^ has_inversion), (in_net_name, controlling_value ^ 1)))
+
+        # Equivalence class of a dominating fault is represented by class of a dominated fault
+        dominated_roots = {}
+        if use_dominance:
+            for (dominating_fault, dominated_fault) in dominating_faults:
+                if dominating_fault in parent_faults and dominated_fault in parent_faults:
+                    dominated_roots.setdefault(find_root(dominating_fault), find_root(dominated_fault))
+
+        representative_of = {}
+        for fault in faults:
+            representative_fault = find_root(fault)
+            while representative_fault in dominated_roots:
+                representative_fault = dominated_roots[representative_fault]
+            representative_of[fault] = representative_fault
+        return sorted(set(representative_of.values())), representative_of
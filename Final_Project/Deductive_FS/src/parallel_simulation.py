@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from simulation import Simulation
+
+# Simulation owned by each worker process, built once when worker starts
+worker_sim = None
+worker_faults = []
+worker_fault_classes = {}
+
+def init_worker(netlist_filepath: str, faults_filepath: str, use_collapsing: bool, use_cache: bool):
+    global worker_sim, worker_faults, worker_fault_classes
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker_sim = Simulation()
+        worker_sim.build_netlist_from_file(netlist_filepath, use_cache)
+        worker_sim.place_stuck_at_faults(faults_filepath, use_collapsing)
+    worker_faults = list(worker_sim.faults_by_id)
+    worker_fault_classes = worker_sim.get_fault_classes()
+
+# Simulate input vectors on a shard of faults (every fault if faults is None) in worker process
+def run_worker_fault_simulations(faults: list, input_lines: list[str], reset_detection: bool, engine: str, drop_detected_faults: bool):
+    worker_sim.place_stuck_at_fault_list(worker_faults if faults == None else faults, worker_fault_classes)
+    all_detected_faults = worker_sim.run_fault_simulations_with_inputs(input_lines, reset_detection, None, None, engine, drop_detected_faults)
+    return all_detected_faults, worker_sim.first_detecting_vectors
+
+class ParallelSimulation:
+    def __init__(self, netlist_filepath: str, faults_filepath: str = None, use_collapsing: bool = False, num_workers: int = None, use_cache: bool = False):
+        self.num_workers = num_workers if num_workers != None else os.cpu_count()
+        self.first_detecting_vectors = {}
+
+        # Fault list in main process is only used for sharding and for counting faults
+        self.sim = Simulation()
+        self.sim.build_netlist_from_file(netlist_filepath, use_cache)
+        self.sim.place_stuck_at_faults(faults_filepath, use_collapsing)
+
+        self.executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=init_worker, initargs=(netlist_filepath, faults_filepath, use_collapsing, use_cache))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def close(self):
+        self.sim.close_result_writer()
+        self.executor.shutdown()
+
+    def count_stuck_at_faults(self):
+        return self.sim.count_stuck_at_faults()
+
+    # Shard fault list across workers, or shard input vectors if shard_vectors is specified in non-cumulative fault simulation
+    # Cumulative fault simulation covers input vectors of this call only
+    # If output_filepath is specified, print results and write results into file specified in input vector order
+    def run_fault_simulations_with_inputs(self, input_lines: list[str], reset_detection: bool, circuit_name: str, output_filepath: str = None, engine: str = "deductive", drop_detected_faults: bool = False, shard_vectors: bool = False):
+        self.first_detecting_vectors = {}
+        for input_line in input_lines:
+            if len(input_line) != len(self.sim.netlist.input_nets) or input_line.strip("01") != "":
+                print(f"Invalid input {input_line}")
+                return None
+        all_detected_faults = [set() for _ in input_lines]
+
+        if shard_vectors and reset_detection:
+            # Contiguous chunks of input vectors, each simulated on every fault
+            chunk_size = max(1, -(-len(input_lines) // self.num_workers))
+            starts = range(0, len(input_lines), chunk_size)
+            futures = [self.executor.submit(run_worker_fault_simulations, None, input_lines[start:start + chunk_size], True, engine, False) for start in starts]
+            for (start, future) in zip(starts, futures):
+                (chunk_detected_faults, _) = future.result()
+                if chunk_detected_faults == None:
+                    return None
+                all_detected_faults[start:start + len(chunk_detected_faults)] = chunk_detected_faults
+        else:
+            # Disjoint shards of faults, each simulated on every input vector
+            faults = self.sim.faults_by_id
+            fault_shards = [faults[i::self.num_workers] for i in range(min(self.num_workers, len(faults)))]
+            futures = [self.executor.submit(run_worker_fault_simulations, fault_shard, input_lines, reset_detection, engine, drop_detected_faults) for fault_shard in fault_shards]
+            for future in futures:
+                (shard_detected_faults, shard_first_detecting_vectors) = future.result()
+                if shard_detected_faults == None:
+                    return None
+                for (detected_faults, shard_faults) in zip(all_detected_faults, shard_detected_faults):
+                    detected_faults.update(shard_faults)
+                self.first_detecting_vectors.update(shard_first_detecting_vectors)
+
+        if output_filepath != None:
+            is_result_writer_opened = (self.sim.result_writer == None)
+            if is_result_writer_opened:
+                self.sim.open_result_writer(output_filepath)
+            for (input_line, detected_faults) in zip(input_lines, all_detected_faults):
+                self.sim.write_detected_faults(input_line, detected_faults, reset_detection, circuit_name, output_filepath)
+            if is_result_writer_opened:
+                self.sim.close_result_writer()
+        return all_detected_faults
+
+    # Results are written in main process, so result writer belongs to its simulation
+    def open_result_writer(self, output_filepath: str, output_format: str = "text", delta_only: bool = False, echo: bool = True):
+        return self.sim.open_result_writer(output_filepath, output_format, delta_only, echo)
+
+    def close_result_writer(self):
+        self.sim.close_result_writer()
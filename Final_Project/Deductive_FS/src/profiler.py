@@ -0,0 +1,123 @@
+import contextlib
+import json
+import time
+import tracemalloc
+
+profile_counters = ["gate_evaluations", "implications", "backtracks", "PODEM_calls", "fault_set_operations", "simulated_vectors", "stems", "stem_fallbacks"]
+profile_phases = ["parse", "levelize", "simulate", "propagate", "generate", "report"]
+
+no_profiling = contextlib.nullcontext()
+
+# Time phase with profiler, or do nothing if profiler is None
+def profile_phase(profiler, phase: str):
+    return no_profiling if profiler == None else profiler.phase(phase)
+
+# Opt-in profile of netlist, Simulation and TestGenerator runs: counters, time per phase and memory traced between start and stop
+# Engines hold a profiler only while profiling, and record into it once per input vector or fault rather than once per gate,
+# so nothing is counted or timed when they hold None
+class Profiler:
+    def __init__(self, trace_memory: bool = True, num_top_allocations: int = 10):
+        self.trace_memory = trace_memory
+        self.num_top_allocations = num_top_allocations
+        self.is_tracing_memory = False
+        self.reset()
+
+    def reset(self):
+        self.counters = dict.fromkeys(profile_counters, 0)
+        self.phase_seconds = dict.fromkeys(profile_phases, 0.0)
+        self.phase_calls = dict.fromkeys(profile_phases, 0)
+        self.num_D_frontier_samples = 0
+        self.D_frontier_size_total = 0
+        self.max_D_frontier_size = 0
+        self.peak_fault_list_size = 0
+        self.memory_summary = None
+        self.start_time = None
+        self.total_seconds = 0.0
+
+    # tracemalloc slows down every allocation, so it only runs between start and stop (unless already started elsewhere)
+    def start(self):
+        self.start_time = time.perf_counter()
+        if (self.trace_memory and not tracemalloc.is_tracing()):
+            tracemalloc.start()
+            self.is_tracing_memory = True
+
+    def stop(self):
+        if self.start_time != None:
+            self.total_seconds += time.perf_counter() - self.start_time
+            self.start_time = None
+        if (self.trace_memory and tracemalloc.is_tracing()):
+            (current_bytes, peak_bytes) = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:self.num_top_allocations]
+            self.memory_summary = {
+                "current_bytes": current_bytes,
+                "peak_bytes": peak_bytes,
+                "top_allocations": [{"location": f"{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}", "size_bytes": statistic.size, "count": statistic.count} for statistic in statistics]
+            }
+        if self.is_tracing_memory:
+            tracemalloc.stop()
+            self.is_tracing_memory = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.stop()
+
+    @contextlib.contextmanager
+    def phase(self, phase: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[phase] += time.perf_counter() - start_time
+            self.phase_calls[phase] += 1
+
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] += amount
+
+    def record_D_frontier_size(self, size: int):
+        self.num_D_frontier_samples += 1
+        self.D_frontier_size_total += size
+        if size > self.max_D_frontier_size:
+            self.max_D_frontier_size = size
+
+    def record_fault_list_size(self, size: int):
+        if size > self.peak_fault_list_size:
+            self.peak_fault_list_size = size
+
+    def get_summary(self):
+        return {
+            "total_seconds": self.total_seconds,
+            "counters": dict(self.counters),
+            "D_frontier": {
+                "samples": self.num_D_frontier_samples,
+                "mean_size": self.D_frontier_size_total / self.num_D_frontier_samples if self.num_D_frontier_samples > 0 else 0,
+                "max_size": self.max_D_frontier_size
+            },
+            "peak_fault_list_size": self.peak_fault_list_size,
+            "phases": {phase: {"seconds": self.phase_seconds[phase], "calls": self.phase_calls[phase]} for phase in profile_phases},
+            "memory": self.memory_summary
+        }
+
+    def write_json(self, output_filepath: str):
+        with open(output_filepath, "w") as output_file:
+            json.dump(self.get_summary(), output_file, indent = 2)
+
+    def print_summary(self):
+        summary = self.get_summary()
+        print(f"Profile   total time: {summary["total_seconds"]:.3f} s")
+        for (phase, phase_summary) in summary["phases"].items():
+            if phase_summary["calls"] > 0:
+                print(f"{phase:<12}{phase_summary["seconds"]:>10.3f} s{phase_summary["calls"]:>10} calls")
+        for (counter, value) in summary["counters"].items():
+            print(f"{counter:<24}{value:>12}")
+        if summary["counters"]["stems"] > 0:
+            print(f"Stem fallbacks: {summary["counters"]["stem_fallbacks"]} of {summary["counters"]["stems"]} stems ({100 * summary["counters"]["stem_fallbacks"] / summary["counters"]["stems"]:.1f}%)")
+        print(f"D-frontier size: mean {summary["D_frontier"]["mean_size"]:.2f}, max {summary["D_frontier"]["max_size"]}")
+        print(f"Peak fault list size: {summary["peak_fault_list_size"]}")
+        if summary["memory"] != None:
+            print(f"Memory: current {summary["memory"]["current_bytes"] / 2**20:.1f} MiB, peak {summary["memory"]["peak_bytes"] / 2**20:.1f} MiB")
+            for allocation in summary["memory"]["top_allocations"]:
+                print(f"  {allocation["size_bytes"] / 2**10:>10.1f} KiB {allocation["count"]:>9} blocks  {allocation["location"]}")
+        print()
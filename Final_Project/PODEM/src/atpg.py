@@ -0,0 +1,184 @@
+import random
+import time
+from simulation import Simulation
+from compaction import fill_test_vector, simulate_test_vector
+from test_generator import TestGenerator, PODEMOutcome
+
+# Test generation for all faults of a circuit: random test vectors until fault coverage saturates, then PODEM for faults still undetected
+# Every test vector is fault simulated with fault dropping, so PODEM never targets a fault that some test vector already detects
+# PODEM test vectors keep don't-cares (X) left by test generation, so compaction can merge them, and are simulated with don't-cares filled with 0
+# With dynamic compaction, PODEM targets at most max_secondary_faults secondary faults per test vector, each aborted after secondary_backtrack_limit backtracks
+class ATPG:
+    def __init__(self, backtrack_limit: int = None, time_limit: float = None, max_secondary_faults: int = 16, secondary_backtrack_limit: int = 4):
+        self.sim = Simulation()
+        self.gen = TestGenerator(backtrack_limit, time_limit)
+        self.secondary_gen = TestGenerator(secondary_backtrack_limit, time_limit)
+        self.max_secondary_faults = max_secondary_faults
+        self.use_dominance = False
+        self.reset_test_set()
+
+    # Build netlist once and share it between test generator and fault simulator, which keep net values in their own lists
+    # Place stuck-at faults to target, only representative faults of equivalence classes if use_collapsing is specified
+    # With use_dominance, PODEM first targets faults dominating no other fault, then only dominating faults their test vectors missed
+    def build_netlist_from_file(self, netlist_filepath: str, faults_filepath: str = None, use_collapsing: bool = False, use_dominance: bool = False, use_cache: bool = False):
+        self.gen.build_netlist_from_file(netlist_filepath, use_cache)
+        self.secondary_gen.load_netlist(self.gen.netlist)
+        self.sim.load_netlist(self.gen.netlist)
+        self.sim.place_stuck_at_faults(faults_filepath, use_collapsing)
+        self.use_dominance = use_dominance
+        self.reset_test_set()
+
+    def reset_test_set(self):
+        self.test_vectors = []
+        self.num_random_vectors = 0
+        self.num_random_detected_faults = 0
+        self.undetectable_faults = set()
+        self.aborted_faults = set()
+        self.num_PODEM_calls = 0
+        self.num_backtracks = 0
+        self.random_phase_time = 0
+        self.PODEM_phase_time = 0
+        if self.sim.netlist != None:
+            self.sim.reset_detected_faults()
+
+    def count_detected_faults(self):
+        return len(self.sim.decode_faults(self.sim.detected_faults))
+
+    # Whether PODEM already found fault undetectable or aborted it (every fault of its class shares its outcome)
+    def is_classified_fault(self, fault_id: int):
+        fault = self.sim.fault_classes_by_id[fault_id][0]
+        return fault in self.undetectable_faults or fault in self.aborted_faults
+
+    # Keep random test vectors that detect new faults, until saturation_limit random test vectors in a row detect nothing new
+    # or max_random_vectors random test vectors are simulated
+    def run_random_phase(self, random_gen: random.Random, circuit_name: str, saturation_limit: int = 32, max_random_vectors: int = None):
+        assert self.sim.netlist != None
+        start_time = time.perf_counter()
+
+        all_faults_mask = (1 << len(self.sim.faults_by_id)) - 1
+        num_simulated_vectors = 0
+        num_useless_vectors = 0
+        while (num_useless_vectors < saturation_limit and self.sim.detected_faults != all_faults_mask):
+            if (max_random_vectors != None and num_simulated_vectors >= max_random_vectors):
+                break
+            random_test_vector = self.gen.generate_random_test_vector(random_gen, len(self.sim.netlist.input_nets))
+            num_simulated_vectors += 1
+            if simulate_test_vector(self.sim, random_test_vector, circuit_name) != 0:
+                self.test_vectors.append(random_test_vector)
+                self.num_random_vectors += 1
+                num_useless_vectors = 0
+            else:
+                num_useless_vectors += 1
+
+        self.num_random_detected_faults = self.count_detected_faults()
+        self.random_phase_time += time.perf_counter() - start_time
+
+    # Fault IDs in order PODEM targets them: with dominance, faults dominating another fault come last, since a test vector
+    # for the fault they dominate detects them too, and PODEM only targets those still undetected (when the fault they dominate
+    # is undetectable or aborted), so only PODEM outcome of a fault itself marks it undetectable
+    def get_target_fault_ids(self):
+        if not self.use_dominance:
+            return list(range(len(self.sim.faults_by_id)))
+        (_, representative_of) = self.sim.netlist.collapse_faults(self.sim.faults_by_id, True)
+        is_dominating = [representative_of[fault] != fault for fault in self.sim.faults_by_id]
+        return sorted(range(len(self.sim.faults_by_id)), key = lambda fault_id: is_dominating[fault_id])
+
+    # Run PODEM for each fault not detected yet, in order of target fault IDs, and fault simulate each test vector generated
+    # With dynamic compaction, don't-care bits of each test vector are used to target further faults before it is simulated
+    def run_PODEM_phase(self, circuit_name: str, use_dynamic_compaction: bool = False):
+        assert self.sim.netlist != None
+        start_time = time.perf_counter()
+
+        target_fault_ids = self.get_target_fault_ids()
+        for (position, fault_id) in enumerate(target_fault_ids):
+            if (self.sim.detected_faults >> fault_id) & 1:
+                continue
+            (faulty_net_name, stuck_at_value) = self.sim.faults_by_id[fault_id]
+            (outcome, test_vector) = self.gen.find_test_vector_by_PODEM(faulty_net_name, stuck_at_value, keep_dont_cares = True)
+            self.num_PODEM_calls += 1
+            self.num_backtracks += self.gen.num_backtracks
+
+            match outcome:
+                case PODEMOutcome.VECTOR:
+                    if use_dynamic_compaction:
+                        test_vector = self.target_secondary_faults(test_vector, target_fault_ids[position + 1:])
+                    simulate_test_vector(self.sim, test_vector, circuit_name)
+                    self.test_vectors.append(test_vector)
+                case PODEMOutcome.UNDETECTABLE:
+                    self.undetectable_faults.update(self.sim.fault_classes_by_id[fault_id])
+                case PODEMOutcome.ABORTED:
+                    self.aborted_faults.update(self.sim.fault_classes_by_id[fault_id])
+
+        self.PODEM_phase_time += time.perf_counter() - start_time
+
+    # Dynamic compaction: run PODEM for undetected faults targeted after primary fault, keeping bits already assigned in test vector,
+    # until test vector has no don't-care bit left or max_secondary_faults faults are targeted
+    # Faults targeted before primary fault are already detected or targeted, and faults already found undetectable or aborted are skipped
+    # A fault failing here is only undetectable under this test vector (or aborted after secondary_backtrack_limit backtracks),
+    # and it is never targeted again for this test vector, whose assigned bits only grow
+    def target_secondary_faults(self, test_vector: str, fault_ids: list[int]):
+        num_secondary_faults = 0
+        for fault_id in fault_ids:
+            if ("X" not in test_vector or num_secondary_faults >= self.max_secondary_faults):
+                break
+            if ((self.sim.detected_faults >> fault_id) & 1 or self.is_classified_fault(fault_id)):
+                continue
+            (faulty_net_name, stuck_at_value) = self.sim.faults_by_id[fault_id]
+            (outcome, secondary_test_vector) = self.secondary_gen.find_test_vector_by_PODEM(faulty_net_name, stuck_at_value, test_vector, True)
+            num_secondary_faults += 1
+            self.num_PODEM_calls += 1
+            self.num_backtracks += self.secondary_gen.num_backtracks
+            if (outcome == PODEMOutcome.VECTOR):
+                test_vector = secondary_test_vector
+        return test_vector
+
+    def run_ATPG(self, random_gen: random.Random, circuit_name: str, saturation_limit: int = 32, max_random_vectors: int = None, use_dynamic_compaction: bool = False):
+        self.run_random_phase(random_gen, circuit_name, saturation_limit, max_random_vectors)
+        self.run_PODEM_phase(circuit_name, use_dynamic_compaction)
+        return self.test_vectors
+
+    # Write test vectors into file specified, one test vector per line, with don't-cares filled with 0 as simulated
+    def write_test_vectors(self, test_set_filepath: str):
+        try:
+            with open(test_set_filepath, "w") as test_set_file:
+                for test_vector in self.test_vectors:
+                    test_set_file.write(f"{fill_test_vector(test_vector)}\n")
+        except FileNotFoundError:
+            print(f"File {test_set_filepath} was not found!")
+        except Exception as exception:
+            print(f"Exception occurred: {exception}")
+
+    # Print coverage report and write it into file specified
+    def write_coverage_report(self, circuit_name: str, output_filepath: str):
+        num_faults = self.sim.count_stuck_at_faults()
+        num_detected_faults = self.count_detected_faults()
+        fault_coverage = 100 * num_detected_faults / num_faults if num_faults > 0 else 100
+        fault_efficiency = 100 * (num_detected_faults + len(self.undetectable_faults)) / num_faults if num_faults > 0 else 100
+
+        report_lines = [
+            f"Circuit: {circuit_name}   ATPG coverage report\n",
+            f"Total number of faults: {num_faults}",
+            f"Faults detected: {num_detected_faults} (random phase: {self.num_random_detected_faults}, PODEM phase: {num_detected_faults - self.num_random_detected_faults})",
+            f"Undetectable faults: {len(self.undetectable_faults)}",
+            f"Aborted faults: {len(self.aborted_faults)}",
+            f"Fault coverage: {fault_coverage:.2f}%   Fault efficiency: {fault_efficiency:.2f}%",
+            f"Test vectors: {len(self.test_vectors)} (random phase: {self.num_random_vectors}, PODEM phase: {len(self.test_vectors) - self.num_random_vectors})",
+            f"PODEM calls: {self.num_PODEM_calls}   Total number of backtracks: {self.num_backtracks}",
+            f"Random phase time: {self.random_phase_time:.3f} s   PODEM phase time: {self.PODEM_phase_time:.3f} s\n"
+        ]
+        for (net_name, stuck_at_value) in sorted(self.undetectable_faults):
+            report_lines.append(f"{net_name:>5} stuck at  {stuck_at_value}   undetectable")
+        for (net_name, stuck_at_value) in sorted(self.aborted_faults):
+            report_lines.append(f"{net_name:>5} stuck at  {stuck_at_value}   aborted")
+
+        try:
+            with open(output_filepath, "a") as output_file:
+                for report_line in report_lines:
+                    print(report_line)
+                    output_file.write(f"{report_line}\n")
+                print()
+                output_file.write("\n")
+        except FileNotFoundError:
+            print(f"File {output_filepath} was not found!")
+        except Exception as exception:
+            print(f"Exception occurred: {exception}")
@@ -0,0 +1,156 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import time
+from netlist import Netlist
+from simulation import Simulation
+from test_generator import TestGenerator, PODEMOutcome
+
+benchmark_results_version = 1
+
+# Direction of each metric compared against baseline: 1 if higher is better, -1 if lower is better
+benchmark_metrics = {
+    "load_seconds": -1,
+    "good_simulation_vectors_per_second": 1,
+    "parallel_simulation_vectors_per_second": 1,
+    "fault_simulation_fault_vectors_per_second": 1,
+    "ppsfp_fault_simulation_fault_vectors_per_second": 1,
+    "ppsfp_speedup": 1,
+    "PODEM_faults_per_second": 1,
+    "PODEM_backtracks": -1
+}
+
+# Time netlist load, good simulation, deductive fault simulation, parallel-pattern single-fault propagation (PPSFP) and PODEM on each circuit,
+# keeping the best of repeat runs; PPSFP speedup is time of deductive fault simulation over time of PPSFP on the same input vectors
+# Console output of simulation and test generation is suppressed while measuring
+class Benchmark:
+    def __init__(self, num_vectors: int = 128, num_PODEM_faults: int = 100, repeat: int = 3, seed: int = 0, backtrack_limit: int = 100):
+        self.num_vectors = num_vectors
+        self.num_PODEM_faults = num_PODEM_faults
+        self.repeat = repeat
+        self.seed = seed
+        self.backtrack_limit = backtrack_limit
+        self.results = {}
+
+    def get_settings(self):
+        return {"num_vectors": self.num_vectors, "num_PODEM_faults": self.num_PODEM_faults, "repeat": self.repeat, "seed": self.seed, "backtrack_limit": self.backtrack_limit}
+
+    # Return best time in seconds of repeat calls of function, and result of last call
+    def measure(self, function):
+        best_seconds = None
+        for _ in range(self.repeat):
+            start_time = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = function()
+            seconds = time.perf_counter() - start_time
+            if (best_seconds == None or seconds < best_seconds):
+                best_seconds = seconds
+        return (best_seconds, result)
+
+    def load_netlist(self, netlist_filepath: str):
+        netlist = Netlist()
+        netlist.build_from_file(netlist_filepath)
+        return netlist
+
+    def run_circuit(self, netlist_filepath: str, circuit_name: str):
+        random_gen = random.Random(self.seed)
+        (load_seconds, netlist) = self.measure(lambda: self.load_netlist(netlist_filepath))
+
+        sim = Simulation()
+        sim.load_netlist(netlist)
+        sim.place_stuck_at_faults()
+        num_faults = len(sim.faults_by_id)
+        input_vectors = ["".join(random_gen.choice("01") for _ in range(len(netlist.input_nets))) for _ in range(self.num_vectors)]
+
+        (good_simulation_seconds, _) = self.measure(lambda: [sim.simulate_input(input_vector) for input_vector in input_vectors])
+        (parallel_simulation_seconds, _) = self.measure(lambda: list(sim.stream_simulations(input_vectors)))
+        (fault_simulation_seconds, _) = self.measure(lambda: sim.run_fault_simulations_with_inputs(input_vectors, True, circuit_name))
+        (ppsfp_fault_simulation_seconds, _) = self.measure(lambda: sim.run_fault_simulations_with_inputs(input_vectors, True, circuit_name, engine = "ppsfp"))
+
+        # PODEM targets the same random sample of faults in every run
+        faults = [(net_name, stuck_at_value) for net_name in netlist.nets_by_name for stuck_at_value in [0, 1]]
+        PODEM_faults = random_gen.sample(faults, min(self.num_PODEM_faults, len(faults)))
+        gen = TestGenerator(self.backtrack_limit)
+        gen.load_netlist(netlist)
+        outcome_counts = {outcome.value: 0 for outcome in PODEMOutcome}
+        num_backtracks = 0
+        PODEM_seconds = 0
+        for (faulty_net_name, stuck_at_value) in PODEM_faults:
+            start_time = time.perf_counter()
+            (outcome, _) = gen.find_test_vector_by_PODEM(faulty_net_name, stuck_at_value)
+            PODEM_seconds += time.perf_counter() - start_time
+            outcome_counts[outcome.value] += 1
+            num_backtracks += gen.num_backtracks
+
+        return {
+            "gates": len(netlist.gates),
+            "nets": len(netlist.nets_by_name),
+            "inputs": len(netlist.input_nets),
+            "outputs": len(netlist.output_nets),
+            "faults": num_faults,
+            "load_seconds": load_seconds,
+            "good_simulation_vectors_per_second": self.num_vectors / good_simulation_seconds,
+            "parallel_simulation_vectors_per_second": self.num_vectors / parallel_simulation_seconds,
+            "fault_simulation_fault_vectors_per_second": num_faults * self.num_vectors / fault_simulation_seconds,
+            "ppsfp_fault_simulation_fault_vectors_per_second": num_faults * self.num_vectors / ppsfp_fault_simulation_seconds,
+            "ppsfp_speedup": fault_simulation_seconds / ppsfp_fault_simulation_seconds,
+            "PODEM_faults": len(PODEM_faults),
+            "PODEM_faults_per_second": len(PODEM_faults) / PODEM_seconds if PODEM_seconds > 0 else 0,
+            "PODEM_backtracks": num_backtracks,
+            "PODEM_outcomes": outcome_counts
+        }
+
+    # circuits maps circuit name to netlist filepath
+    def run(self, circuits: dict):
+        self.results = {
+            "version": benchmark_results_version,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "settings": self.get_settings(),
+            "circuits": {}
+        }
+        for (circuit_name, netlist_filepath) in circuits.items():
+            print(f"Benchmarking circuit {circuit_name}")
+            self.results["circuits"][circuit_name] = self.run_circuit(netlist_filepath, circuit_name)
+        return self.results
+
+    def write_results(self, output_filepath: str):
+        with open(output_filepath, "w") as output_file:
+            json.dump(self.results, output_file, indent = 2)
+
+    def print_results(self):
+        print(f"{"Circuit":<20}{"Gates":>9}{"Load (s)":>10}{"Sim (vec/s)":>13}{"Par (vec/s)":>13}{"FSim (f*v/s)":>14}{"PPSFP (x)":>11}{"PODEM (f/s)":>13}{"Backtracks":>12}")
+        for (circuit_name, result) in self.results["circuits"].items():
+            print(f"{circuit_name:<20}{result["gates"]:>9}{result["load_seconds"]:>10.3f}{result["good_simulation_vectors_per_second"]:>13.0f}"
+                  f"{result["parallel_simulation_vectors_per_second"]:>13.0f}{result["fault_simulation_fault_vectors_per_second"]:>14.0f}{result["ppsfp_speedup"]:>11.2f}"
+                  f"{result["PODEM_faults_per_second"]:>13.1f}{result["PODEM_backtracks"]:>12}")
+
+    # Return messages for metrics of circuits in both results that are worse than baseline by more than tolerance (a fraction)
+    def compare_with_baseline(self, baseline_filepath: str, tolerance: float = 0.2):
+        with open(baseline_filepath, "r") as baseline_file:
+            baseline_results = json.load(baseline_file)
+        if (baseline_results.get("version") != benchmark_results_version):
+            raise ValueError(f"Baseline {baseline_filepath} has benchmark results version {baseline_results.get("version")}, expected {benchmark_results_version}")
+        if (baseline_results.get("settings") != self.results["settings"]):
+            print(f"Warning: baseline {baseline_filepath} was measured with other settings {baseline_results.get("settings")}")
+
+        regressions = []
+        for (circuit_name, result) in self.results["circuits"].items():
+            baseline_result = baseline_results["circuits"].get(circuit_name)
+            if baseline_result == None:
+                continue
+            for (metric, direction) in benchmark_metrics.items():
+                (value, baseline_value) = (result[metric], baseline_result.get(metric))
+                if (baseline_value == None or baseline_value == 0):
+                    continue
+                change = direction * (value - baseline_value) / baseline_value
+                if (change < -tolerance):
+                    regressions.append(f"{circuit_name} {metric}: {value:.4g} vs baseline {baseline_value:.4g} ({100 * change:+.1f}%)")
+        return regressions
+
+# Circuits in directory, by file name
+def find_circuits(files_dirpath: str):
+    return {filename: os.path.join(files_dirpath, filename) for filename in sorted(os.listdir(files_dirpath)) if filename.endswith((".txt", ".bench"))}
@@ -0,0 +1,166 @@
+import math
+import random
+from array import array
+
+# Random combinational circuit in files/ format, the same for the same parameters and seed
+# Gates are placed on levels 1 to depth over input nets on level 0, and each gate reads one net of the level right below it,
+# so the circuit has exactly the depth given
+# Fan-in of multiple-input gates is drawn from fanin_weights, where fanin_weights[k] is the weight of fan-in k + 2
+# Once every net of a level is read, further reads of that level favour a few nets more as fanout_skew grows (1 is uniform)
+# With probability reconvergence_rate, each further input net of a gate is taken from the fanin cone of its first input net,
+# so both paths meet again at this gate
+# XOR and XNOR gates (2 input nets only, as in fault simulation) make up xor_density of multiple-input gates
+# Every net no gate reads becomes output net, so output nets can be more than num_outputs, and further output nets are picked at random
+class CircuitGenerator:
+    def __init__(self, num_gates: int, num_inputs: int, num_outputs: int, depth: int = 32, fanin_weights: list[float] = [6, 3, 1], fanout_skew: float = 1.5,
+                 reconvergence_rate: float = 0.2, xor_density: float = 0.1, inverter_ratio: float = 0.15, seed: int = 0):
+        if (num_gates < 1 or num_inputs < 1 or num_outputs < 1 or depth < 1):
+            raise ValueError("Numbers of gates, input nets and output nets and depth must be positive")
+        if (len(fanin_weights) == 0 or min(fanin_weights) < 0 or sum(fanin_weights) <= 0):
+            raise ValueError("Fan-in weights must be nonnegative and not all zero")
+        if (fanout_skew < 1):
+            raise ValueError("Fan-out skew must be at least 1")
+        for (name, rate) in [("Reconvergence rate", reconvergence_rate), ("XOR density", xor_density), ("Inverter ratio", inverter_ratio)]:
+            if not (0 <= rate <= 1):
+                raise ValueError(f"{name} must be between 0 and 1")
+
+        self.num_gates = num_gates
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+        self.depth = min(depth, num_gates)
+        self.fanin_weights = fanin_weights
+        self.fanout_skew = fanout_skew
+        self.reconvergence_rate = reconvergence_rate
+        self.xor_density = xor_density
+        self.inverter_ratio = inverter_ratio
+        self.seed = seed
+        self.stats = {}
+
+    # Nets of level in random order, with cursor to the first net not read yet
+    def add_level(self, net_ids: array):
+        self.random_gen.shuffle(net_ids)
+        self.nets_by_level.append(net_ids)
+        self.cursors.append(0)
+
+    # Net of level to read: nets not read yet in turn, then nets drawn with fan-out skew
+    def pick_net(self, level: int):
+        net_ids = self.nets_by_level[level]
+        cursor = self.cursors[level]
+        if cursor < len(net_ids):
+            self.cursors[level] = cursor + 1
+            return net_ids[cursor]
+        return net_ids[int(len(net_ids) * self.random_gen.random() ** self.fanout_skew)]
+
+    # Net in fanin cone of first input net of gate: net read by another gate that also reads the first input net of first input net
+    # (or that net itself), otherwise None if first input net is an input net
+    def pick_reconvergent_net(self, first_in_net_id: int, level: int):
+        ancestor_net_id = self.first_in_net_ids[first_in_net_id]
+        if ancestor_net_id < 0:
+            return None
+        sibling_net_id = self.last_reader_net_ids[ancestor_net_id]
+        if (sibling_net_id >= 0 and sibling_net_id != first_in_net_id and self.net_levels[sibling_net_id] < level):
+            return sibling_net_id
+        return ancestor_net_id
+
+    # Net IDs are net names minus 1: input nets first, then output nets of gates in order written
+    def generate(self, netlist_filepath: str):
+        random_gen = self.random_gen = random.Random(self.seed)
+        num_nets = self.num_inputs + self.num_gates
+        self.net_levels = array("i", [0]) * num_nets
+        self.first_in_net_ids = array("i", [-1]) * num_nets
+        self.last_reader_net_ids = array("i", [-1]) * num_nets
+        is_read = bytearray(num_nets)
+        one_probabilities = array("d", [0.5]) * num_nets
+        self.nets_by_level = []
+        self.cursors = []
+        self.add_level(array("i", range(self.num_inputs)))
+
+        fanins = list(range(2, len(self.fanin_weights) + 2))
+        num_xor_gates = 0
+        num_inverters = 0
+        num_reconvergent_inputs = 0
+        next_net_id = self.num_inputs
+        with open(netlist_filepath, "w", buffering = 1 << 20) as netlist_file:
+            for level in range(1, self.depth + 1):
+                # Gates spread evenly over levels, lower levels taking the rest
+                num_level_gates = self.num_gates // self.depth + (1 if level <= self.num_gates % self.depth else 0)
+                for _ in range(num_level_gates):
+                    first_in_net_id = self.pick_net(level - 1)
+                    in_net_ids = [first_in_net_id]
+                    if random_gen.random() < self.inverter_ratio:
+                        fanin = 1
+                    elif random_gen.random() < self.xor_density:
+                        fanin = 2
+                        gate_type = random_gen.choice(["XOR", "XNOR"])
+                    else:
+                        fanin = random_gen.choices(fanins, self.fanin_weights)[0]
+                        gate_type = None
+                    # Give up on an input net after a few picks of nets already read by gate
+                    for _ in range(4 * (fanin - 1)):
+                        if len(in_net_ids) == fanin:
+                            break
+                        in_net_id = None
+                        if random_gen.random() < self.reconvergence_rate:
+                            in_net_id = self.pick_reconvergent_net(first_in_net_id, level)
+                        if in_net_id == None:
+                            # Mostly nets of levels close below
+                            in_net_level = max(0, level - 1 - int(random_gen.expovariate(1)))
+                            in_net_id = self.pick_net(in_net_level)
+                        elif in_net_id not in in_net_ids:
+                            num_reconvergent_inputs += 1
+                        if in_net_id not in in_net_ids:
+                            in_net_ids.append(in_net_id)
+
+                    # Random AND and OR gates drive most nets of deep levels to constant values, leaving most faults undetectable,
+                    # so choose the one whose output net is 1 with probability closer to 1/2, assuming input nets independent
+                    in_net_probabilities = [one_probabilities[in_net_id] for in_net_id in in_net_ids]
+                    if len(in_net_ids) == 1:
+                        gate_type = "INV"
+                        num_inverters += 1
+                        one_probability = 1 - in_net_probabilities[0]
+                    elif gate_type in ["XOR", "XNOR"]:
+                        num_xor_gates += 1
+                        (p, q) = in_net_probabilities
+                        one_probability = p + q - 2 * p * q
+                    else:
+                        and_probability = math.prod(in_net_probabilities)
+                        or_probability = 1 - math.prod(1 - p for p in in_net_probabilities)
+                        (gate_type, one_probability) = ("AND", and_probability) if abs(and_probability - 0.5) < abs(or_probability - 0.5) else ("OR", or_probability)
+                        if random_gen.random() < 0.5:
+                            gate_type = f"N{gate_type}"
+                    if gate_type in ["NAND", "NOR", "XNOR"]:
+                        one_probability = 1 - one_probability
+
+                    out_net_id = next_net_id
+                    next_net_id += 1
+                    self.net_levels[out_net_id] = level
+                    self.first_in_net_ids[out_net_id] = first_in_net_id
+                    one_probabilities[out_net_id] = one_probability
+                    for in_net_id in in_net_ids:
+                        is_read[in_net_id] = 1
+                        self.last_reader_net_ids[in_net_id] = out_net_id
+                    netlist_file.write(f"{gate_type} {" ".join(str(in_net_id + 1) for in_net_id in in_net_ids)} {out_net_id + 1}\n")
+                self.add_level(array("i", range(next_net_id - num_level_gates, next_net_id)))
+
+            output_net_ids = [net_id for net_id in range(self.num_inputs, num_nets) if not is_read[net_id]]
+            num_unread_nets = len(output_net_ids)
+            if len(output_net_ids) < self.num_outputs:
+                read_net_ids = [net_id for net_id in range(self.num_inputs, num_nets) if is_read[net_id]]
+                output_net_ids += random_gen.sample(read_net_ids, min(self.num_outputs - len(output_net_ids), len(read_net_ids)))
+            netlist_file.write(f"INPUT {" ".join(str(net_id + 1) for net_id in range(self.num_inputs))} -1\n")
+            netlist_file.write(f"OUTPUT {" ".join(str(net_id + 1) for net_id in output_net_ids)} -1\n")
+
+        self.stats = {
+            "gates": self.num_gates,
+            "inputs": self.num_inputs,
+            "outputs": len(output_net_ids),
+            "unread_nets": num_unread_nets,
+            "unread_inputs": sum(1 for net_id in range(self.num_inputs) if not is_read[net_id]),
+            "depth": self.depth,
+            "xor_gates": num_xor_gates,
+            "inverters": num_inverters,
+            "reconvergent_inputs": num_reconvergent_inputs
+        }
+        # Working arrays are only needed while generating
+        (self.net_levels, self.first_in_net_ids, self.last_reader_net_ids, self.nets_by_level, self.cursors) = (None, None, None, None, None)
+        return self.stats
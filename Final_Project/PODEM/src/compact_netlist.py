@@ -0,0 +1,328 @@
+from array import array
+from enum import IntEnum
+from gate import Gate, GateType, gates_with_inversion
+from net import Net
+
+gate_types = list(GateType)
+
+# Bitwise operation of gate over its input nets, before inversion
+class GateOperation(IntEnum):
+    BUF = 0
+    AND = 1
+    OR = 2
+    XOR = 3
+
+gate_operations_by_type = {
+    GateType.BUF: GateOperation.BUF,
+    GateType.INV: GateOperation.BUF,
+    GateType.AND: GateOperation.AND,
+    GateType.NAND: GateOperation.AND,
+    GateType.OR: GateOperation.OR,
+    GateType.NOR: GateOperation.OR,
+    GateType.XOR: GateOperation.XOR,
+    GateType.XNOR: GateOperation.XOR
+}
+
+# Same controlling values as gates of the object netlist, indexed by gate operation
+controlling_values_by_operation = [[0, 1], [0], [1], []]
+
+# Core netlist with integer IDs, which is the only store of netlist: nets numbered in order of first appearance in netlist file
+# (which also fixes fault IDs), gates in file order, and Net and Gate objects are views of it
+# Fanin of gate g is fanin_net_ids[fanin_offsets[g]:fanin_offsets[g + 1]], fanout of net n is fanout_gate_ids[fanout_offsets[n]:fanout_offsets[n + 1]]
+# Net values are not kept here: each engine keeps its own list of values indexed by net ID and passes it to the methods below
+class CompactNetlist:
+    def __init__(self, compiled_netlist: dict):
+        self.net_names = compiled_netlist["net_names"]
+        self.net_ids_by_name = None
+        self.input_net_ids = compiled_netlist["input_net_ids"]
+        self.output_net_ids = compiled_netlist["output_net_ids"]
+
+        self.gate_type_codes = compiled_netlist["gate_type_codes"]
+        self.gate_operations = bytes(gate_operations_by_type[gate_types[gate_type_code]] for gate_type_code in self.gate_type_codes)
+        self.gate_inversions = bytes(gate_types[gate_type_code] in gates_with_inversion for gate_type_code in self.gate_type_codes)
+        self.out_net_ids = compiled_netlist["out_net_ids"]
+        self.fanin_offsets = compiled_netlist["fanin_offsets"]
+        self.fanin_net_ids = compiled_netlist["fanin_net_ids"]
+        self.fanout_offsets = compiled_netlist["fanout_offsets"]
+        self.fanout_gate_ids = compiled_netlist["fanout_gate_ids"]
+        self.levels = compiled_netlist["levels"]
+        self.levelized_gate_ids = compiled_netlist["levelized_gate_ids"]
+
+        # SCOAP controllabilities of net n are controllabilities[2 * n] (CC0) and controllabilities[2 * n + 1] (CC1)
+        self.controllabilities = compiled_netlist["controllabilities"]
+        self.observabilities = compiled_netlist["observabilities"]
+
+        self.num_nets = len(self.net_names)
+        self.num_gates = len(self.gate_type_codes)
+        # Gates are on levels 1 to max_level, each gate's fanout gates being on higher levels
+        self.max_level = max(self.levels, default = 0)
+        # Gate driving each net, -1 for nets not driven by any gate
+        self.src_gate_ids = array("i", [-1]) * self.num_nets
+        for (gate_id, out_net_id) in enumerate(self.out_net_ids):
+            self.src_gate_ids[out_net_id] = gate_id
+        self.fanout_free_roots = None
+        self.last_reading_levels = None
+
+    # Mapping from net names to net IDs takes more memory than all arrays together, so it is only built once a net is looked up by name
+    def get_net_id(self, net_name):
+        if self.net_ids_by_name == None:
+            self.net_ids_by_name = {net_name: net_id for (net_id, net_name) in enumerate(self.net_names)}
+        return self.net_ids_by_name.get(net_name)
+
+    # Root net of fanout-free region of each net, indexed by net ID: the net itself if it is an output net or does not feed exactly one gate,
+    # otherwise root of the region of its only gate's output net
+    # A fault effect on a net of the region can only leave the region through its root, along the one path between them
+    def get_fanout_free_roots(self):
+        if self.fanout_free_roots == None:
+            (fanout_offsets, out_net_ids) = (self.fanout_offsets, self.out_net_ids)
+            is_output_net = bytearray(self.num_nets)
+            for output_net_id in self.output_net_ids:
+                is_output_net[output_net_id] = 1
+            fanout_free_roots = array("i", range(self.num_nets))
+            # Root of gate's output net is final before gate is visited, going from the highest level
+            for gate_id in reversed(self.levelized_gate_ids):
+                for in_net_id in self.get_fanin(gate_id):
+                    if (fanout_offsets[in_net_id + 1] - fanout_offsets[in_net_id] == 1 and not is_output_net[in_net_id]):
+                        fanout_free_roots[in_net_id] = fanout_free_roots[out_net_ids[gate_id]]
+            self.fanout_free_roots = fanout_free_roots
+        return self.fanout_free_roots
+
+    # Highest level of a gate reading each net, indexed by net ID: level of the net itself (0 for input nets) if no gate reads it
+    # Value of a net is no longer needed once gates of that level are evaluated
+    def get_last_reading_levels(self):
+        if self.last_reading_levels == None:
+            (fanin_offsets, fanin_net_ids, levels) = (self.fanin_offsets, self.fanin_net_ids, self.levels)
+            last_reading_levels = array("i", [0]) * self.num_nets
+            for (gate_id, out_net_id) in enumerate(self.out_net_ids):
+                last_reading_levels[out_net_id] = levels[gate_id]
+            for gate_id in range(self.num_gates):
+                for i in range(fanin_offsets[gate_id], fanin_offsets[gate_id + 1]):
+                    if levels[gate_id] > last_reading_levels[fanin_net_ids[i]]:
+                        last_reading_levels[fanin_net_ids[i]] = levels[gate_id]
+            self.last_reading_levels = last_reading_levels
+        return self.last_reading_levels
+
+    def get_net(self, net_id: int):
+        return Net(self, net_id)
+
+    def get_gate(self, gate_id: int):
+        return Gate(self, gate_id)
+
+    def get_gate_type(self, gate_id: int):
+        return gate_types[self.gate_type_codes[gate_id]]
+
+    def get_fanin(self, gate_id: int):
+        return self.fanin_net_ids[self.fanin_offsets[gate_id]:self.fanin_offsets[gate_id + 1]]
+
+    def get_fanout(self, net_id: int):
+        return self.fanout_gate_ids[self.fanout_offsets[net_id]:self.fanout_offsets[net_id + 1]]
+
+    # Evaluate gate over values of its input nets, where bit k of each value belongs to input vector k and mask has one bit per input vector
+    def evaluate(self, gate_id: int, values: list[int], mask: int):
+        fanin_net_ids = self.fanin_net_ids
+        start = self.fanin_offsets[gate_id]
+        end = self.fanin_offsets[gate_id + 1]
+        result = values[fanin_net_ids[start]]
+
+        match self.gate_operations[gate_id]:
+            case GateOperation.AND:
+                for i in range(start + 1, end):
+                    result &= values[fanin_net_ids[i]]
+            case GateOperation.OR:
+                for i in range(start + 1, end):
+                    result |= values[fanin_net_ids[i]]
+            case GateOperation.XOR:
+                for i in range(start + 1, end):
+                    result ^= values[fanin_net_ids[i]]
+
+        if self.gate_inversions[gate_id]:
+            result ^= mask
+        return result
+
+    # Evaluate all gates in levelized order, values of input nets being already set
+    # Same as evaluate for each gate, inlined since this loop runs once per input vector (or batch of input vectors)
+    def simulate(self, values: list[int], mask: int):
+        (fanin_offsets, fanin_net_ids, gate_operations, gate_inversions, out_net_ids) = (self.fanin_offsets, self.fanin_net_ids, self.gate_operations, self.gate_inversions, self.out_net_ids)
+        # Plain integers compare faster than enum members
+        (and_operation, or_operation, xor_operation) = (GateOperation.AND.value, GateOperation.OR.value, GateOperation.XOR.value)
+        for gate_id in self.levelized_gate_ids:
+            start = fanin_offsets[gate_id]
+            end = fanin_offsets[gate_id + 1]
+            result = values[fanin_net_ids[start]]
+            operation = gate_operations[gate_id]
+            if (operation == and_operation):
+                for i in range(start + 1, end):
+                    result &= values[fanin_net_ids[i]]
+            elif (operation == or_operation):
+                for i in range(start + 1, end):
+                    result |= values[fanin_net_ids[i]]
+            elif (operation == xor_operation):
+                for i in range(start + 1, end):
+                    result ^= values[fanin_net_ids[i]]
+            if gate_inversions[gate_id]:
+                result ^= mask
+            values[out_net_ids[gate_id]] = result
+
+    # Deductive fault simulation of one input vector, values of input nets and fault lists of input nets being already set
+    # Fault lists are bitmasks of fault IDs, and fault_ids[v][n] is the ID of stuck-at-v fault of net n (-1 if that fault is not placed)
+    # Return False if some gate is not supported
+    def propagate_fault_lists(self, values: list[int], fault_lists: list[int], fault_ids: list[array]):
+        (fanin_offsets, fanin_net_ids, gate_operations, gate_inversions, out_net_ids) = (self.fanin_offsets, self.fanin_net_ids, self.gate_operations, self.gate_inversions, self.out_net_ids)
+        (buf_operation, or_operation, xor_operation) = (GateOperation.BUF.value, GateOperation.OR.value, GateOperation.XOR.value)
+        for gate_id in self.levelized_gate_ids:
+            start = fanin_offsets[gate_id]
+            end = fanin_offsets[gate_id + 1]
+            out_net_id = out_net_ids[gate_id]
+            operation = gate_operations[gate_id]
+            logic_value = values[fanin_net_ids[start]]
+
+            if (operation == xor_operation):
+                if (end - start != 2):
+                    print("XOR or XNOR with 2 inputs only is supported in fault simulation")
+                    return False
+                logic_value ^= values[fanin_net_ids[start + 1]]
+                propagated_faults = fault_lists[fanin_net_ids[start]] ^ fault_lists[fanin_net_ids[start + 1]]
+            else:
+                # Output net flips only if every input net at controlling value flips and no other input net flips
+                # Buffers and inverters count their only input net as controlling
+                controlling_value = 1 if (operation == or_operation) else 0
+                controlling_intersection = -1
+                noncontrolling_union = 0
+                has_controlling_input = False
+                for i in range(start, end):
+                    in_net_id = fanin_net_ids[i]
+                    if (operation == buf_operation or values[in_net_id] == controlling_value):
+                        has_controlling_input = True
+                        controlling_intersection &= fault_lists[in_net_id]
+                    else:
+                        noncontrolling_union |= fault_lists[in_net_id]
+                if has_controlling_input:
+                    propagated_faults = controlling_intersection & ~noncontrolling_union
+                    if (operation != buf_operation):
+                        logic_value = controlling_value
+                else:
+                    propagated_faults = noncontrolling_union
+                    logic_value = controlling_value ^ 1
+
+            logic_value ^= gate_inversions[gate_id]
+            values[out_net_id] = logic_value
+            fault_id = fault_ids[logic_value ^ 1][out_net_id]
+            fault_lists[out_net_id] = propagated_faults | (1 << fault_id) if fault_id >= 0 else propagated_faults
+        return True
+
+    # One gate of propagate_fault_lists, for engines re-evaluating only some gates: return good value of output net
+    # and faults of input nets that flip it, without output net's own fault
+    # XOR and XNOR gates flip with an odd number of flipped input nets, whatever their number of input nets
+    def evaluate_fault_list(self, gate_id: int, values: list[int], fault_lists: list[int]):
+        fanin_net_ids = self.fanin_net_ids
+        start = self.fanin_offsets[gate_id]
+        end = self.fanin_offsets[gate_id + 1]
+        operation = self.gate_operations[gate_id]
+
+        if (operation == GateOperation.XOR):
+            logic_value = 0
+            propagated_faults = 0
+            for i in range(start, end):
+                logic_value ^= values[fanin_net_ids[i]]
+                propagated_faults ^= fault_lists[fanin_net_ids[i]]
+        else:
+            controlling_value = 1 if (operation == GateOperation.OR) else 0
+            controlling_intersection = -1
+            noncontrolling_union = 0
+            has_controlling_input = False
+            for i in range(start, end):
+                in_net_id = fanin_net_ids[i]
+                if (operation == GateOperation.BUF or values[in_net_id] == controlling_value):
+                    has_controlling_input = True
+                    controlling_intersection &= fault_lists[in_net_id]
+                else:
+                    noncontrolling_union |= fault_lists[in_net_id]
+            if has_controlling_input:
+                propagated_faults = controlling_intersection & ~noncontrolling_union
+                logic_value = values[fanin_net_ids[start]] if (operation == GateOperation.BUF) else controlling_value
+            else:
+                propagated_faults = noncontrolling_union
+                logic_value = controlling_value ^ 1
+        return (logic_value ^ self.gate_inversions[gate_id], propagated_faults)
+
+    # Check whether flipping good value of input net (feeding gate only once) alone flips good value of gate's output net
+    def is_sensitive_to_input(self, gate_id: int, in_net_id: int, values: list[int]):
+        controlling_values = controlling_values_by_operation[self.gate_operations[gate_id]]
+        if len(controlling_values) != 1:
+            return True
+        controlling_value = controlling_values[0]
+        num_controlling_inputs = 0
+        for fanin_net_id in self.get_fanin(gate_id):
+            if values[fanin_net_id] == controlling_value:
+                num_controlling_inputs += 1
+        if values[in_net_id] == controlling_value:
+            return num_controlling_inputs == 1
+        return num_controlling_inputs == 0
+
+    # Evaluate gate in three-valued logic, where None is unknown value x
+    def evaluate_verbose(self, gate_id: int, values: list):
+        fanin_net_ids = self.fanin_net_ids
+        start = self.fanin_offsets[gate_id]
+        end = self.fanin_offsets[gate_id + 1]
+        has_inversion = self.gate_inversions[gate_id]
+        result = values[fanin_net_ids[start]]
+
+        match self.gate_operations[gate_id]:
+            case GateOperation.AND:
+                for i in range(start + 1, end):
+                    in_net_value = values[fanin_net_ids[i]]
+                    if (result == 0 or in_net_value == 0):
+                        return has_inversion
+                    result = 1 if (result == 1 and in_net_value == 1) else None
+            case GateOperation.OR:
+                for i in range(start + 1, end):
+                    in_net_value = values[fanin_net_ids[i]]
+                    if (result == 1 or in_net_value == 1):
+                        return 1 ^ has_inversion
+                    result = 0 if (result == 0 and in_net_value == 0) else None
+            case GateOperation.XOR:
+                for i in range(start + 1, end):
+                    in_net_value = values[fanin_net_ids[i]]
+                    if (result == None or in_net_value == None):
+                        return None
+                    result ^= in_net_value
+
+        if (has_inversion and result != None):
+            result ^= 1
+        return result
+
+    # Evaluate gate in good and faulty circuit, output net stays x in both unless both values are known
+    def evaluate_with_possible_fault(self, gate_id: int, logic_values: list, faulty_values: list):
+        logic_value = self.evaluate_verbose(gate_id, logic_values)
+        faulty_value = self.evaluate_verbose(gate_id, faulty_values)
+
+        if (faulty_value == None):
+            logic_value = None
+        elif (logic_value == None):
+            faulty_value = None
+        return (logic_value, faulty_value)
+
+    # Choose input net of gate that is x in good and faulty circuit, and its value, to move output net towards expected value
+    def backtrace(self, gate_id: int, expected_out_net_value: int, logic_values: list, faulty_values: list):
+        controllabilities = self.controllabilities
+        has_inversion = self.gate_inversions[gate_id]
+        fanin = self.get_fanin(gate_id)
+        x_in_net_ids = [in_net_id for in_net_id in fanin if (logic_values[in_net_id] == None and faulty_values[in_net_id] == None)]
+
+        match self.gate_operations[gate_id]:
+            case GateOperation.XOR:
+                possible_value = expected_out_net_value
+                for in_net_id in fanin:
+                    if (logic_values[in_net_id] != None or faulty_values[in_net_id] != None):
+                        possible_value ^= logic_values[in_net_id]
+                        if has_inversion:
+                            possible_value ^= 1
+                # Every input net must be set to decide output net, so choose the hardest one first
+                return (max(x_in_net_ids, key = lambda in_net_id: controllabilities[2 * in_net_id + possible_value]), possible_value)
+            case operation:
+                in_net_value = expected_out_net_value ^ has_inversion
+                # One input net at controlling value is enough, so choose the easiest one to set
+                # Otherwise every input net must be set, so choose the hardest one first to fail early
+                if in_net_value in controlling_values_by_operation[operation]:
+                    return (min(x_in_net_ids, key = lambda in_net_id: controllabilities[2 * in_net_id + in_net_value]), in_net_value)
+                return (max(x_in_net_ids, key = lambda in_net_id: controllabilities[2 * in_net_id + in_net_value]), in_net_value)
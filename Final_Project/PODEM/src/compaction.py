@@ -0,0 +1,82 @@
+from simulation import Simulation
+
+# Test vector bits not assigned by test generation are don't-cares, marked with X
+def fill_test_vector(test_vector: str, fill_value: int = 0):
+    return test_vector.replace("X", str(fill_value))
+
+# Two test vectors are compatible if no bit is 0 in one of them and 1 in the other
+def merge_test_vectors(test_vector: str, other_test_vector: str):
+    merged_bits = []
+    for (bit, other_bit) in zip(test_vector, other_test_vector):
+        if bit == "X":
+            merged_bits.append(other_bit)
+        elif (other_bit == "X" or other_bit == bit):
+            merged_bits.append(bit)
+        else:
+            return None
+    return "".join(merged_bits)
+
+# Fault simulate test vector (don't-cares filled with fill_value) cumulatively with fault dropping,
+# return bitmask of faults detected for the first time
+def simulate_test_vector(sim: Simulation, test_vector: str, circuit_name: str, fill_value: int = 0):
+    detected_faults_mask = sim.detected_faults
+    sim.run_fault_simulation_with_input(fill_test_vector(test_vector, fill_value), False, circuit_name, drop_detected_faults=True)
+    return sim.detected_faults & ~detected_faults_mask
+
+# Static compaction of test set over faults placed in simulation
+# Fault simulation in reverse order with fault dropping keeps only test vectors that detect a fault no later test vector detects
+class TestSetCompactor:
+    def __init__(self, sim: Simulation):
+        self.sim = sim
+
+    # Keep test vectors detecting new faults when simulated in given order, starting with no fault detected
+    def drop_useless_test_vectors(self, test_vectors: list[str], circuit_name: str):
+        self.sim.reset_detected_faults()
+        return [test_vector for test_vector in test_vectors if simulate_test_vector(self.sim, test_vector, circuit_name) != 0]
+
+    # Greedily merge each test vector into the first compatible test vector merged so far
+    def merge_compatible_test_vectors(self, test_vectors: list[str]):
+        merged_test_vectors = []
+        for test_vector in test_vectors:
+            for (i, merged_test_vector) in enumerate(merged_test_vectors):
+                new_merged_test_vector = merge_test_vectors(merged_test_vector, test_vector)
+                if new_merged_test_vector != None:
+                    merged_test_vectors[i] = new_merged_test_vector
+                    break
+            else:
+                merged_test_vectors.append(test_vector)
+        return merged_test_vectors
+
+    # Return compacted test vectors detecting every fault that given test vectors detect, with don't-cares filled with fill_value
+    # A merged test vector keeps bits that made each test vector detect its target fault, but may miss faults detected by chance,
+    # so original test vectors follow merged ones and are kept only where they detect a fault merged ones miss
+    def compact_test_vectors(self, test_vectors: list[str], circuit_name: str, merge_compatible: bool = False, fill_value: int = 0):
+        assert self.sim.netlist != None
+
+        candidate_test_vectors = [fill_test_vector(test_vector, fill_value) for test_vector in test_vectors]
+        if merge_compatible:
+            merged_test_vectors = [fill_test_vector(test_vector, fill_value) for test_vector in self.merge_compatible_test_vectors(test_vectors)]
+            candidate_test_vectors = self.drop_useless_test_vectors(merged_test_vectors + candidate_test_vectors, circuit_name)
+
+        compacted_test_vectors = self.drop_useless_test_vectors(list(reversed(candidate_test_vectors)), circuit_name)
+        compacted_test_vectors.reverse()
+        return compacted_test_vectors
+
+    # Print number of test vectors before and after compaction and write it into file specified
+    def write_compaction_report(self, num_test_vectors: int, num_compacted_test_vectors: int, circuit_name: str, output_filepath: str):
+        reduction_ratio = num_test_vectors / num_compacted_test_vectors if num_compacted_test_vectors > 0 else 1
+        reduction_percentage = 100 * (num_test_vectors - num_compacted_test_vectors) / num_test_vectors if num_test_vectors > 0 else 0
+        report_lines = [
+            f"Circuit: {circuit_name}   Test set compaction",
+            f"Test vectors before compaction: {num_test_vectors}   after compaction: {num_compacted_test_vectors}",
+            f"Reduction ratio: {reduction_ratio:.2f}x ({reduction_percentage:.2f}% fewer test vectors)\n"
+        ]
+        try:
+            with open(output_filepath, "a") as output_file:
+                for report_line in report_lines:
+                    print(report_line)
+                    output_file.write(f"{report_line}\n")
+        except FileNotFoundError:
+            print(f"File {output_filepath} was not found!")
+        except Exception as exception:
+            print(f"Exception occurred: {exception}")
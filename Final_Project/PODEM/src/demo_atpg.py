@@ -0,0 +1,44 @@
+from atpg import ATPG
+from compaction import TestSetCompactor
+import argparse
+import random
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--circuit", type=str, required=True, help="Circuit in PODEM/files/ directory")
+    parser.add_argument("--output", type=str, required=True, help="Output filepath for coverage report")
+    parser.add_argument("--test_set", type=str, required=True, help="Output filepath for test vectors, one test vector per line")
+    parser.add_argument("--faults", type=str, required=False, default=None, help="Faults filepath (all stuck-at faults if not specified)")
+    parser.add_argument("--collapse", type=str, choices=["equivalence", "dominance"], default=None, help="Whether to target only representative faults after fault collapsing (dominating faults only when missed by test vectors of faults they dominate)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for random test vectors")
+    parser.add_argument("--saturation_limit", type=int, default=32, help="Number of random test vectors in a row detecting no new fault before random phase stops")
+    parser.add_argument("--max_random_vectors", type=int, default=None, help="Maximum number of random test vectors simulated")
+    parser.add_argument("--compact", action="store_true", help="Whether to compact test set by reverse-order fault simulation")
+    parser.add_argument("--merge", action="store_true", help="Whether to also merge compatible test vectors when compacting test set")
+    parser.add_argument("--dynamic_compaction", action="store_true", help="Whether to fill don't-care bits of each PODEM test vector by targeting further undetected faults")
+    parser.add_argument("--max_secondary_faults", type=int, default=16, help="Maximum number of further faults targeted for each PODEM test vector in dynamic compaction")
+    parser.add_argument("--secondary_backtrack_limit", type=int, default=4, help="Maximum number of backtracks before test generation for a further fault in dynamic compaction is aborted")
+    parser.add_argument("--use_cache", action="store_true", help="Whether to load compiled netlist cached next to netlist file (compiling and caching it if needed)")
+    parser.add_argument("--backtrack_limit", type=int, default=None, help="Maximum number of backtracks before test generation for a fault is aborted")
+    parser.add_argument("--time_limit", type=float, default=None, help="Maximum time in seconds before test generation for a fault is aborted")
+
+    arguments = parser.parse_args()
+
+    circuit_name = arguments.circuit
+    netlist_filepath = f"../files/{circuit_name}"
+
+    output_filepath = arguments.output
+    test_set_filepath = arguments.test_set
+    faults_filepath = arguments.faults
+    fault_collapsing = arguments.collapse
+
+    atpg = ATPG(arguments.backtrack_limit, arguments.time_limit, arguments.max_secondary_faults, arguments.secondary_backtrack_limit)
+    atpg.build_netlist_from_file(netlist_filepath, faults_filepath, fault_collapsing != None, fault_collapsing == "dominance", arguments.use_cache)
+    atpg.run_ATPG(random.Random(arguments.seed), circuit_name, arguments.saturation_limit, arguments.max_random_vectors, arguments.dynamic_compaction)
+    atpg.write_coverage_report(circuit_name, output_filepath)
+    if arguments.compact:
+        compactor = TestSetCompactor(atpg.sim)
+        num_test_vectors = len(atpg.test_vectors)
+        atpg.test_vectors = compactor.compact_test_vectors(atpg.test_vectors, circuit_name, arguments.merge)
+        compactor.write_compaction_report(num_test_vectors, len(atpg.test_vectors), circuit_name, output_filepath)
+    atpg.write_test_vectors(test_set_filepath)
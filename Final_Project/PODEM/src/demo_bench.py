@@ -0,0 +1,44 @@
+from benchmark import Benchmark, find_circuits
+from circuit_generator import CircuitGenerator
+import argparse
+import os
+import sys
+import tempfile
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", type=str, required=True, help="Output filepath for benchmark results (JSON)")
+    parser.add_argument("--circuits", type=str, nargs="+", default=None, help="Circuits in PODEM/files/ directory (all of them if not specified)")
+    parser.add_argument("--generated_gates", type=int, nargs="*", default=[1000, 5000], help="Number of gates of each generated circuit")
+    parser.add_argument("--vectors", type=int, default=128, help="Number of random input vectors simulated per circuit")
+    parser.add_argument("--PODEM_faults", type=int, default=100, help="Number of random faults targeted by PODEM per circuit")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each measurement, keeping the best one")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated circuits, input vectors and faults")
+    parser.add_argument("--backtrack_limit", type=int, default=100, help="Maximum number of backtracks before test generation for a fault is aborted")
+    parser.add_argument("--baseline", type=str, default=None, help="Filepath of benchmark results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Fraction by which a metric may be worse than baseline before it counts as regression")
+
+    arguments = parser.parse_args()
+
+    circuits = find_circuits("../files")
+    if arguments.circuits != None:
+        circuits = {circuit_name: circuits.get(circuit_name, f"../files/{circuit_name}") for circuit_name in arguments.circuits}
+
+    benchmark = Benchmark(arguments.vectors, arguments.PODEM_faults, arguments.repeat, arguments.seed, arguments.backtrack_limit)
+    with tempfile.TemporaryDirectory() as generated_dirpath:
+        for num_gates in arguments.generated_gates:
+            netlist_filepath = os.path.join(generated_dirpath, f"generated_{num_gates}.txt")
+            num_inputs = max(8, num_gates // 50)
+            CircuitGenerator(num_gates, num_inputs, num_inputs, seed = arguments.seed).generate(netlist_filepath)
+            circuits[f"generated_{num_gates}"] = netlist_filepath
+        benchmark.run(circuits)
+
+    benchmark.write_results(arguments.output)
+    benchmark.print_results()
+    if arguments.baseline != None:
+        regressions = benchmark.compare_with_baseline(arguments.baseline, arguments.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        print(f"{len(regressions)} regression(s) against baseline {arguments.baseline}")
+        if len(regressions) > 0:
+            sys.exit(1)
@@ -0,0 +1,30 @@
+from circuit_generator import CircuitGenerator
+import argparse
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gates", type=int, required=True, help="Number of gates")
+    parser.add_argument("--circuit", type=str, default=None, help="Circuit written into files/ directory (generated_<gates>.txt if not specified)")
+    parser.add_argument("--inputs", type=int, default=None, help="Number of input nets (gates / 50, at least 8, if not specified)")
+    parser.add_argument("--outputs", type=int, default=None, help="Minimum number of output nets (same as input nets if not specified)")
+    parser.add_argument("--depth", type=int, default=32, help="Number of levels of gates")
+    parser.add_argument("--fanin_weights", type=float, nargs="+", default=[6, 3, 1], help="Weights of fan-in 2, 3, ... of multiple-input gates")
+    parser.add_argument("--fanout_skew", type=float, default=1.5, help="Skew of fan-out towards a few nets of each level (1 is uniform)")
+    parser.add_argument("--reconvergence", type=float, default=0.2, help="Probability that further input net of gate is taken from fanin cone of its first input net")
+    parser.add_argument("--xor_density", type=float, default=0.1, help="Fraction of multiple-input gates that are XOR or XNOR")
+    parser.add_argument("--inverters", type=float, default=0.15, help="Fraction of gates that are inverters")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of random generator")
+
+    arguments = parser.parse_args()
+
+    num_inputs = arguments.inputs if arguments.inputs != None else max(8, arguments.gates // 50)
+    num_outputs = arguments.outputs if arguments.outputs != None else num_inputs
+    circuit_name = arguments.circuit if arguments.circuit != None else f"generated_{arguments.gates}.txt"
+    netlist_filepath = f"../files/{circuit_name}"
+
+    circuit_gen = CircuitGenerator(arguments.gates, num_inputs, num_outputs, arguments.depth, arguments.fanin_weights, arguments.fanout_skew,
+                                   arguments.reconvergence, arguments.xor_density, arguments.inverters, arguments.seed)
+    stats = circuit_gen.generate(netlist_filepath)
+    print(f"Circuit {circuit_name} written into {netlist_filepath}")
+    for (name, value) in stats.items():
+        print(f"{name}: {value}")
@@ -0,0 +1,36 @@
+from simulation import Simulation
+from compaction import TestSetCompactor
+import argparse
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--circuit", type=str, required=True, help="Circuit in PODEM/files/ directory")
+    parser.add_argument("--test_set", type=str, required=True, help="Filepath of test vectors to compact, one test vector per line (X for don't-care bits)")
+    parser.add_argument("--compacted_test_set", type=str, required=True, help="Output filepath for compacted test vectors")
+    parser.add_argument("--output", type=str, required=True, help="Output filepath for compaction report")
+    parser.add_argument("--faults", type=str, required=False, default=None, help="Faults filepath (all stuck-at faults if not specified)")
+    parser.add_argument("--merge", action="store_true", help="Whether to merge compatible test vectors")
+
+    arguments = parser.parse_args()
+
+    circuit_name = arguments.circuit
+    netlist_filepath = f"../files/{circuit_name}"
+
+    test_vectors = []
+    try:
+        with open(arguments.test_set, "r") as test_set_file:
+            test_vectors = [line.strip() for line in test_set_file if len(line.strip()) > 0]
+    except FileNotFoundError:
+        print(f"File {arguments.test_set} was not found!")
+
+    sim = Simulation()
+    sim.build_netlist_from_file(netlist_filepath)
+    sim.place_stuck_at_faults(arguments.faults)
+
+    compactor = TestSetCompactor(sim)
+    compacted_test_vectors = compactor.compact_test_vectors(test_vectors, circuit_name, arguments.merge)
+    compactor.write_compaction_report(len(test_vectors), len(compacted_test_vectors), circuit_name, arguments.output)
+
+    with open(arguments.compacted_test_set, "w") as compacted_test_set_file:
+        for test_vector in compacted_test_vectors:
+            compacted_test_set_file.write(f"{test_vector}\n")
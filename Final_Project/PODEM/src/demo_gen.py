@@ -1,16 +1,38 @@
 from simulation import Simulation
-from test_generator import TestGenerator
+from test_generator import TestGenerator, PODEMOutcome
+from parallel_test_generator import ParallelTestGenerator
+from compaction import fill_test_vector, simulate_test_vector
+from netlist import parse_net_name
 import argparse
+import contextlib
 
 def fault_info(fault_str):
     (faulty_net_info, stuck_at_info) = fault_str.split(",")
-    return (int(faulty_net_info), int(stuck_at_info))
+    return (parse_net_name(faulty_net_info), int(stuck_at_info))
+
+# Run PODEM for each valid fault, in worker processes of parallel_gen if it is specified,
+# and yield (fault, PODEM outcome, test vector or None, number of backtracks, time spent) in order of faults
+def generate_test_vectors(gen: TestGenerator, parallel_gen: ParallelTestGenerator, faults: list[tuple[int, int]], keep_dont_cares: bool):
+    if parallel_gen != None:
+        yield from parallel_gen.generate_test_vectors_by_PODEM(faults)
+        return
+    for (faulty_net_name, stuck_at_value) in faults:
+        if not gen.is_valid_fault(faulty_net_name, stuck_at_value):
+            continue
+        (outcome, test_vector) = gen.find_test_vector_by_PODEM(faulty_net_name, stuck_at_value, keep_dont_cares = keep_dont_cares)
+        yield ((faulty_net_name, stuck_at_value), outcome, test_vector, gen.num_backtracks, gen.elapsed_time)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--circuit", type=str, required=True, help="Circuit in PODEM/files/ directory")
     parser.add_argument("--faults", type=fault_info, required=True, nargs="+", help="Space-separated list of stuck-at faults, each in the form of <faulty net>,<stuck-at value>")
     parser.add_argument("--output", type=str, required=True, help="Output filepath")
+    parser.add_argument("--collapse", type=str, choices=["equivalence", "dominance"], default=None, help="Whether to generate test vectors only for representative faults after equivalence fault collapsing, and with dominance, for dominating faults only if no test vector generated detects them")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes generating test vectors")
+    parser.add_argument("--backtrack_limit", type=int, default=None, help="Maximum number of backtracks before test generation for a fault is aborted")
+    parser.add_argument("--time_limit", type=float, default=None, help="Maximum time in seconds before test generation for a fault is aborted")
+    parser.add_argument("--dont_cares", action="store_true", help="Whether to keep input nets unassigned by PODEM as X in test vectors")
+    parser.add_argument("--use_cache", action="store_true", help="Whether to load compiled netlist cached next to netlist file (compiling and caching it if needed)")
     parser.add_argument("--enable_sim", action="store_true", help="Whether to do fault simulation with test vector generated")
 
     arguments = parser.parse_args()
@@ -21,18 +43,81 @@ if __name__ == "__main__":
     test_gen_faults = arguments.faults
     output_filepath = arguments.output
     is_sim_enabled = arguments.enable_sim
+    keep_dont_cares = arguments.dont_cares
+    use_cache = arguments.use_cache
+    fault_collapsing = arguments.collapse
+    num_workers = arguments.workers
+    backtrack_limit = arguments.backtrack_limit
+    time_limit = arguments.time_limit
 
     sim = None
-    gen = TestGenerator()
+    gen = TestGenerator(backtrack_limit, time_limit)
 
-    gen.build_netlist_from_file(netlist_filepath)
+    gen.build_netlist_from_file(netlist_filepath, use_cache)
+    # PODEM targets each fault of target_faults, whose result is reported for every listed fault of its equivalence class
+    # With dominance, faults dominating another listed fault are left to dominating_faults, targeted only if no test vector generated detects them
+    target_faults = test_gen_faults
+    dominating_faults = []
+    fault_classes = {fault: [fault] for fault in test_gen_faults}
+    if fault_collapsing != None:
+        (representative_faults, representative_of) = gen.netlist.collapse_faults(test_gen_faults)
+        fault_classes = {}
+        for fault in dict.fromkeys(test_gen_faults):
+            fault_classes.setdefault(representative_of[fault], []).append(fault)
+        print(f"Collapsed {len(set(test_gen_faults))} faults into {len(representative_faults)} representative faults\n")
+        target_faults = representative_faults
+        if fault_collapsing == "dominance":
+            (_, dominated_representative_of) = gen.netlist.collapse_faults(test_gen_faults, True)
+            dominating_faults = [fault for fault in representative_faults if dominated_representative_of[fault] != fault]
+            target_faults = [fault for fault in representative_faults if dominated_representative_of[fault] == fault]
+    # Fault simulation results go through one result writer kept open for the whole run, which is flushed after each test vector
+    # so that the next test generation result appended to the same file comes after them
     if is_sim_enabled:
         sim = Simulation()
-        sim.build_netlist_from_file(netlist_filepath)
+        sim.load_netlist(gen.netlist)
         sim.place_stuck_at_faults()
+        sim.open_result_writer(output_filepath)
+
+    # Statistics over listed faults: number of faults for each PODEM outcome, and over PODEM runs: total number of backtracks and total PODEM time
+    outcome_counts = {outcome: 0 for outcome in PODEMOutcome}
+    total_backtracks = 0
+    total_PODEM_time = 0
+    test_vectors = []
+
+    # Report result for every listed fault of class of fault, and fault simulate new test vector
+    def report_result(fault, outcome: PODEMOutcome, test_vector: str, num_backtracks: int, is_new_test_vector: bool = True):
+        for (faulty_net_name, stuck_at_value) in fault_classes[fault]:
+            gen.write_test_vector(faulty_net_name, stuck_at_value, outcome, test_vector, num_backtracks, circuit_name, output_filepath)
+            outcome_counts[outcome] += 1
+        if is_new_test_vector and (test_vector != None):
+            test_vectors.append(test_vector)
+            if is_sim_enabled:
+                sim.run_fault_simulation_with_input(fill_test_vector(test_vector), True, circuit_name, output_filepath)
+                sim.result_writer.flush()
 
-    for (faulty_net_name, stuck_at_value) in test_gen_faults:
-        test_vector = gen.generate_test_vector_by_PODEM(faulty_net_name, stuck_at_value, circuit_name, output_filepath)
+    with (ParallelTestGenerator(netlist_filepath, num_workers, backtrack_limit, time_limit, keep_dont_cares, use_cache) if num_workers > 1 else contextlib.nullcontext()) as parallel_gen:
+        for (fault, outcome, test_vector, num_backtracks, elapsed_time) in generate_test_vectors(gen, parallel_gen, target_faults, keep_dont_cares):
+            report_result(fault, outcome, test_vector, num_backtracks)
+            total_backtracks += num_backtracks
+            total_PODEM_time += elapsed_time
+
+        # A dominating fault detected by a test vector generated (with don't-cares filled with 0) is reported with that test vector,
+        # and PODEM targets it only otherwise, since the fault it dominates may be undetectable while it is not
+        if len(dominating_faults) > 0:
+            dominance_sim = Simulation()
+            dominance_sim.load_netlist(gen.netlist)
+            dominance_sim.place_stuck_at_fault_list(dominating_faults)
+            for test_vector in test_vectors:
+                for fault in sorted(dominance_sim.decode_faults(simulate_test_vector(dominance_sim, test_vector, circuit_name))):
+                    report_result(fault, PODEMOutcome.VECTOR, fill_test_vector(test_vector), 0, False)
+            undetected_faults = [fault for fault in dominating_faults if fault not in dominance_sim.decode_faults(dominance_sim.detected_faults)]
+            for (fault, outcome, test_vector, num_backtracks, elapsed_time) in generate_test_vectors(gen, parallel_gen, undetected_faults, keep_dont_cares):
+                report_result(fault, outcome, test_vector, num_backtracks)
+                total_backtracks += num_backtracks
+                total_PODEM_time += elapsed_time
+
+    if is_sim_enabled:
+        sim.close_result_writer()
 
-        if is_sim_enabled and (test_vector != None):
-            sim.run_fault_simulation_with_input(test_vector, True, circuit_name, output_filepath)
\ No newline at end of file
+    print(f"Test vectors generated: {outcome_counts[PODEMOutcome.VECTOR]}   Undetectable faults: {outcome_counts[PODEMOutcome.UNDETECTABLE]}   Aborted faults: {outcome_counts[PODEMOutcome.ABORTED]}")
+    print(f"Total number of backtracks: {total_backtracks}   Total PODEM time: {total_PODEM_time:.3f} s")
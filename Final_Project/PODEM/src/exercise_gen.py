@@ -1,7 +1,18 @@
 from test_generator import TestGenerator
+from profiler import Profiler
+import argparse
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", type=str, nargs="?", const="../test_files/gen_profile.json", default=None, help="Whether to profile test generation, writing profile (JSON) into filepath given or ../test_files/gen_profile.json")
+    arguments = parser.parse_args()
+
     gen = TestGenerator()
+    profiler = None
+    if arguments.profile != None:
+        profiler = Profiler()
+        gen.profiler = profiler
+        profiler.start()
 
     scenarios = ["s27", "s298f_2", "s344f_2", "s349f_2"]
     test_generation_stuck_at_faults = {
@@ -16,4 +27,11 @@ if __name__ == "__main__":
         gen.build_netlist_from_file(f"../files/{test_gen_scenario}.txt")
         print("Start generating test vectors for specified stuck-at faults\n")
         for (faulty_net_name, stuck_at_value) in test_generation_stuck_at_faults[test_gen_scenario]:
-            gen.generate_test_vector_by_PODEM(faulty_net_name, stuck_at_value, f"{test_gen_scenario}.txt", f"../test_files/test_gen_outputs.txt")
\ No newline at end of file
+            gen.generate_test_vector_by_PODEM(faulty_net_name, stuck_at_value, f"{test_gen_scenario}.txt", f"../test_files/test_gen_outputs.txt")
+
+    if profiler != None:
+        profiler.stop()
+        print("----------------------------------------")
+        profiler.print_summary()
+        profiler.write_json(arguments.profile)
+        print(f"Profile written into {arguments.profile}")
@@ -1,17 +1,43 @@
+import math
+
+# View of net net_id of compact netlist, which keeps everything about the net in its arrays
+# Views are made when a net is looked at and cost no memory otherwise; two views of the same net are equal
 class Net:
-    def __init__(self, name: int):
-        self.name = name
-        
-        self.des_gates = []
-        self.src_gate = None
-        
-        self.logic_value = None
-        self.faulty_value = None
-        self.assigned = False
-        self.is_fault_activated = False
-
-        self.stuck_at_values = set()
-        self.faults = set()
+    __slots__ = ("compact_netlist", "id")
+
+    def __init__(self, compact_netlist, net_id: int):
+        self.compact_netlist = compact_netlist
+        self.id = net_id
+
+    @property
+    def name(self):
+        return self.compact_netlist.net_names[self.id]
+
+    @property
+    def des_gates(self):
+        return [self.compact_netlist.get_gate(gate_id) for gate_id in self.compact_netlist.get_fanout(self.id)]
+
+    @property
+    def src_gate(self):
+        src_gate_id = self.compact_netlist.src_gate_ids[self.id]
+        return self.compact_netlist.get_gate(src_gate_id) if src_gate_id >= 0 else None
+
+    # SCOAP testability measures: [CC0, CC1] and CO
+    @property
+    def controllability(self):
+        controllabilities = self.compact_netlist.controllabilities
+        return [int(controllabilities[2 * self.id]), int(controllabilities[2 * self.id + 1])]
+
+    @property
+    def observability(self):
+        observability = self.compact_netlist.observabilities[self.id]
+        return int(observability) if observability != math.inf else math.inf
+
+    def __eq__(self, other):
+        return isinstance(other, Net) and self.compact_netlist is other.compact_netlist and self.id == other.id
+
+    def __hash__(self):
+        return self.id
 
     def __repr__(self):
-        return f"net {self.name}"
\ No newline at end of file
+        return f"net {self.name}"
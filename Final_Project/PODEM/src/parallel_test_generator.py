@@ -0,0 +1,50 @@
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from test_generator import TestGenerator
+
+# Test generator owned by each worker process, with its own copy of netlist
+worker_gen = None
+worker_keep_dont_cares = False
+
+def init_worker(netlist_filepath: str, backtrack_limit: int, time_limit: float, keep_dont_cares: bool, use_cache: bool):
+    global worker_gen, worker_keep_dont_cares
+    worker_keep_dont_cares = keep_dont_cares
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker_gen = TestGenerator(backtrack_limit, time_limit)
+        worker_gen.build_netlist_from_file(netlist_filepath, use_cache)
+
+# Return whether fault is valid, PODEM outcome, test vector for fault (None if there is none), number of backtracks and time spent
+def run_worker_PODEM(fault: tuple[int, int]):
+    (faulty_net_name, stuck_at_value) = fault
+    if not worker_gen.is_valid_fault(faulty_net_name, stuck_at_value):
+        return (False, None, None, 0, 0)
+    (outcome, test_vector) = worker_gen.find_test_vector_by_PODEM(faulty_net_name, stuck_at_value, keep_dont_cares = worker_keep_dont_cares)
+    return (True, outcome, test_vector, worker_gen.num_backtracks, worker_gen.elapsed_time)
+
+class ParallelTestGenerator:
+    def __init__(self, netlist_filepath: str, num_workers: int = None, backtrack_limit: int = None, time_limit: float = None, keep_dont_cares: bool = False, use_cache: bool = False):
+        self.num_workers = num_workers if num_workers != None else os.cpu_count()
+        self.gen = TestGenerator()
+        self.executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=init_worker, initargs=(netlist_filepath, backtrack_limit, time_limit, keep_dont_cares, use_cache))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    # Distribute faults across workers, yield (fault, PODEM outcome, test vector or None, number of backtracks, time spent) in order of faults
+    # and, if output_filepath is specified, write each result into it as soon as it and every result before it are ready
+    def generate_test_vectors_by_PODEM(self, faults: list[tuple[int, int]], circuit_name: str = None, output_filepath: str = None, chunk_size: int = 1):
+        for (fault, (is_valid, outcome, test_vector, num_backtracks, elapsed_time)) in zip(faults, self.executor.map(run_worker_PODEM, faults, chunksize=chunk_size)):
+            if not is_valid:
+                continue
+            (faulty_net_name, stuck_at_value) = fault
+            if output_filepath != None:
+                self.gen.write_test_vector(faulty_net_name, stuck_at_value, outcome, test_vector, num_backtracks, circuit_name, output_filepath)
+            yield (fault, outcome, test_vector, num_backtracks, elapsed_time)
@@ -0,0 +1,171 @@
+import csv
+import json
+import struct
+from netlist import parse_net_name
+
+result_formats = ["text", "jsonl", "csv", "binary"]
+
+binary_results_magic = b"DFSR\x02"
+
+# Pack bit string into bytes, first bit being most significant bit of first byte
+def pack_bits(bit_string: str):
+    num_bytes = (len(bit_string) + 7) // 8
+    if num_bytes == 0:
+        return b""
+    return int(bit_string.ljust(8 * num_bytes, "0"), 2).to_bytes(num_bytes, "big")
+
+def unpack_bits(packed_bits: bytes, num_bits: int):
+    if num_bits == 0:
+        return ""
+    return format(int.from_bytes(packed_bits, "big"), f"0{8 * len(packed_bits)}b")[:num_bits]
+
+# Fault simulation results are written into one buffered file kept open for the whole run
+# In cumulative fault simulation with delta_only, each input vector only lists faults it detects for the first time
+class ResultWriter:
+    file_mode = "a"
+    newline = None
+
+    def __init__(self, output_filepath: str, delta_only: bool = False):
+        self.output_filepath = output_filepath
+        self.delta_only = delta_only
+        self.output_file = None
+        self.reported_faults = set()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def open(self):
+        self.output_file = open(self.output_filepath, self.file_mode, buffering = 1 << 16, newline = self.newline)
+        self.reported_faults = set()
+
+    def close(self):
+        if self.output_file != None:
+            self.output_file.close()
+            self.output_file = None
+
+    # Write buffered results into file, so that other writers appending to the same file come after them
+    def flush(self):
+        if self.output_file != None:
+            self.output_file.flush()
+
+    # Mode of result: "per_vector" (faults detected by input vector), "cumulative" (all faults detected so far) or "delta" (faults newly detected)
+    def get_mode(self, reset_detection: bool):
+        if reset_detection:
+            return "per_vector"
+        return "delta" if self.delta_only else "cumulative"
+
+    def write_detected_faults(self, input_line: str, detected_faults: set, reset_detection: bool, circuit_name: str):
+        mode = self.get_mode(reset_detection)
+        faults = detected_faults
+        if mode == "delta":
+            faults = detected_faults - self.reported_faults
+            self.reported_faults.update(faults)
+        self.write_record(input_line, sorted(faults), mode, len(detected_faults), circuit_name)
+
+    # faults are sorted faults listed for input vector, num_detected_faults counts faults detected by input vector or so far
+    def write_record(self, input_line: str, faults: list[tuple[int, int]], mode: str, num_detected_faults: int, circuit_name: str):
+        raise NotImplementedError
+
+# Same text format as console output, which is also printed if echo is specified
+class TextResultWriter(ResultWriter):
+    def __init__(self, output_filepath: str, delta_only: bool = False, echo: bool = True):
+        super().__init__(output_filepath, delta_only)
+        self.echo = echo
+
+    def write_record(self, input_line: str, faults: list[tuple[int, int]], mode: str, num_detected_faults: int, circuit_name: str):
+        match mode:
+            case "per_vector":
+                header = "------FAULTS DETECTED -----------"
+                footer = f"Number of faults detected: {len(faults)}"
+            case "cumulative":
+                header = "------ALL FAULTS DETECTED SO FAR -----------"
+                footer = f"Total number of faults detected so far: {num_detected_faults}"
+            case "delta":
+                header = "------FAULTS NEWLY DETECTED -----------"
+                footer = f"Number of faults newly detected: {len(faults)}   Total number of faults detected so far: {num_detected_faults}"
+        fault_lines = "".join(f"{faulty_net_name:>5} stuck at  {stuck_at_value}\n" for (faulty_net_name, stuck_at_value) in faults)
+        record = f"Circuit: {circuit_name}   Input Vector: {" ".join(input_line)}\n\n{header}\n{fault_lines}{footer}\n\n"
+        if self.echo:
+            print(record, end="")
+        self.output_file.write(record)
+
+# One JSON object per input vector
+class JSONLinesResultWriter(ResultWriter):
+    def write_record(self, input_line: str, faults: list[tuple[int, int]], mode: str, num_detected_faults: int, circuit_name: str):
+        record = {"circuit": circuit_name, "input_vector": input_line, "mode": mode, "faults": faults, "num_detected_faults": num_detected_faults}
+        self.output_file.write(json.dumps(record, separators = (",", ":")) + "\n")
+
+# One row per input vector, faults listed as space-separated <faulty net>:<stuck-at value>
+class CSVResultWriter(ResultWriter):
+    newline = ""
+
+    def open(self):
+        super().open()
+        self.csv_writer = csv.writer(self.output_file)
+        if self.output_file.tell() == 0:
+            self.csv_writer.writerow(["circuit", "input_vector", "mode", "num_detected_faults", "faults"])
+
+    def write_record(self, input_line: str, faults: list[tuple[int, int]], mode: str, num_detected_faults: int, circuit_name: str):
+        self.csv_writer.writerow([circuit_name, input_line, mode, num_detected_faults, " ".join(f"{faulty_net_name}:{stuck_at_value}" for (faulty_net_name, stuck_at_value) in faults)])
+
+# Binary records: mode (uint8), number of input bits (uint16) and packed input bits, number of detected faults (uint32),
+# number of faults listed (uint32) and each fault as faulty net name (uint16 length and UTF-8 bytes) and stuck-at value (uint8),
+# all little-endian, so names of .bench nets are kept as they are
+# File starts with magic bytes and circuit name (uint16 length and UTF-8 bytes)
+class BinaryResultWriter(ResultWriter):
+    file_mode = "ab"
+    modes = ["per_vector", "cumulative", "delta"]
+
+    def write_record(self, input_line: str, faults: list[tuple[int, int]], mode: str, num_detected_faults: int, circuit_name: str):
+        if self.output_file.tell() == 0:
+            encoded_circuit_name = circuit_name.encode()
+            self.output_file.write(binary_results_magic + struct.pack("<H", len(encoded_circuit_name)) + encoded_circuit_name)
+        record = bytearray(struct.pack("<BH", self.modes.index(mode), len(input_line)))
+        record += pack_bits(input_line)
+        record += struct.pack("<II", num_detected_faults, len(faults))
+        for (faulty_net_name, stuck_at_value) in faults:
+            encoded_net_name = str(faulty_net_name).encode()
+            record += struct.pack("<H", len(encoded_net_name))
+            record += encoded_net_name
+            record.append(stuck_at_value)
+        self.output_file.write(record)
+
+# Yield records of binary results file as dictionaries with the same keys as JSON Lines results
+# Net names made of digits are read back as integers, as when reading netlist files
+def read_binary_results(results_filepath: str):
+    with open(results_filepath, "rb") as results_file:
+        if results_file.read(len(binary_results_magic)) != binary_results_magic:
+            raise ValueError(f"File {results_filepath} is not a binary results file")
+        (circuit_name_length,) = struct.unpack("<H", results_file.read(2))
+        circuit_name = results_file.read(circuit_name_length).decode()
+
+        while True:
+            record_header = results_file.read(3)
+            if len(record_header) < 3:
+                break
+            (mode_index, num_input_bits) = struct.unpack("<BH", record_header)
+            input_line = unpack_bits(results_file.read((num_input_bits + 7) // 8), num_input_bits)
+            (num_detected_faults, num_faults) = struct.unpack("<II", results_file.read(8))
+            faults = []
+            for _ in range(num_faults):
+                (net_name_length,) = struct.unpack("<H", results_file.read(2))
+                faulty_net_name = parse_net_name(results_file.read(net_name_length).decode())
+                faults.append([faulty_net_name, results_file.read(1)[0]])
+            yield {"circuit": circuit_name, "input_vector": input_line, "mode": BinaryResultWriter.modes[mode_index], "faults": faults, "num_detected_faults": num_detected_faults}
+
+def create_result_writer(output_filepath: str, output_format: str = "text", delta_only: bool = False, echo: bool = True):
+    match output_format:
+        case "text":
+            return TextResultWriter(output_filepath, delta_only, echo)
+        case "jsonl":
+            return JSONLinesResultWriter(output_filepath, delta_only)
+        case "csv":
+            return CSVResultWriter(output_filepath, delta_only)
+        case "binary":
+            return BinaryResultWriter(output_filepath, delta_only)
+        case _:
+            raise ValueError(f"Unknown result format {output_format}")
@@ -1,198 +1,920 @@
-from netlist import Netlist
+import heapq
+import itertools
+from array import array
+from netlist import Netlist, parse_net_name
+from compact_netlist import GateOperation
+from result_writer import create_result_writer, pack_bits
+from profiler import profile_phase
+
+fault_simulation_engines = ["deductive", "critical_path", "event_driven", "ppsfp"]
+
+# Return positions of set bits in mask, in increasing order
+def bit_positions(mask: int):
+    return [i for i, bit in enumerate(reversed(bin(mask)[2:])) if bit == "1"]
+
+# Return bitmask with bits at given positions set, for masks of num_bits bits
+def mask_of_bit_positions(positions: list[int], num_bits: int):
+    bitmap = bytearray((num_bits + 7) // 8)
+    for position in positions:
+        bitmap[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bitmap, "little")
+
+# Yield input vectors one at a time from file (if input_source is a filepath) or from iterable of input vectors, skipping empty lines
+def read_input_lines(input_source):
+    if isinstance(input_source, str):
+        with open(input_source, "r") as file:
+            for file_line in file:
+                input_line = file_line.strip()
+                if len(input_line) > 0:
+                    yield input_line
+    else:
+        for input_line in input_source:
+            input_line = input_line.strip()
+            if len(input_line) > 0:
+                yield input_line
 
 class Simulation:
     def __init__(self):
         self.netlist = None
+        self.compact_netlist = None
+        # Values of nets indexed by net ID of compact netlist, kept separately for each engine running on it
+        self.logic_values = []
+        self.parallel_values = []
+        self.fault_lists = []
+        # Event-driven fault simulation keeps its values and fault lists from one input vector to the next while its state is valid
+        self.event_values = []
+        self.event_fault_lists = []
+        self.is_event_state_valid = False
+        self.fault_ids = [array("i"), array("i")]
+        self.fault_net_ids = []
+        self.faults_by_id = []
+        self.fault_classes_by_id = []
+        self.detected_faults = 0
+        self.dropped_faults = 0
+        self.first_detecting_vectors = {}
+        self.num_simulated_vectors = 0
+        # Gate evaluations allowed for stem analysis of each stem in critical path tracing,
+        # before the stem is left to parallel flip propagation of all such stems at once
+        self.stem_analysis_budget = 4
+        # Number of input vectors packed into one word by parallel-pattern single-fault propagation,
+        # maximum number of bits of values propagating flips of a group of fanout-free regions at once (one word per region),
+        # and maximum number of bits of values times gates evaluated by a group, so that groups get fewer regions as fanout cones grow
+        self.ppsfp_word_size = 64
+        self.ppsfp_lane_bits = 65536
+        self.ppsfp_cone_bits = 1 << 34
+        # Working state of parallel-pattern single-fault propagation, for one word of input vectors
+        self.ppsfp_values = None
+        self.is_output_net = None
+        self.level_gate_ids = None
+        self.level_expiring_net_ids = None
+        self.is_scheduled_gate = None
+        self.result_writer = None
+        # Profiler recording simulation runs while profiling (None otherwise)
+        self.profiler = None
+
+    def build_netlist_from_file(self, netlist_filepath: str, use_cache: bool = False):
+        netlist = Netlist(self.profiler)
+        netlist.build_from_file(netlist_filepath, use_cache)
+        return self.load_netlist(netlist)
 
-    def build_netlist_from_file(self, netlist_filepath: str):
-        self.netlist = Netlist()
-        self.netlist.build_from_file(netlist_filepath)
+    # Simulate netlist already built (for example by test generator), instead of building it again from file
+    def load_netlist(self, netlist: Netlist):
+        self.netlist = netlist
+        self.compact_netlist = netlist.get_compact_netlist()
+        self.logic_values = [0] * self.compact_netlist.num_nets
+        self.parallel_values = [0] * self.compact_netlist.num_nets
+        self.fault_lists = [0] * self.compact_netlist.num_nets
+        self.event_values = [0] * self.compact_netlist.num_nets
+        self.event_fault_lists = [0] * self.compact_netlist.num_nets
+        self.assign_fault_ids()
         return self.netlist
 
-    def run_simulation_with_input(self, input_line: str):
+    # Raise ValueError if input vector does not have exactly one bit 0 or 1 for each input net
+    def check_input_line(self, input_line: str):
+        if len(input_line) != len(self.compact_netlist.input_net_ids):
+            raise ValueError(f"Invalid input with length {len(input_line)}")
+        if input_line.strip("01") != "":
+            raise ValueError(f"Invalid input {input_line}")
+
+    # Fault simulation engines print why input vector is invalid and skip it, with the same message whichever engine is chosen
+    def is_valid_input_line(self, input_line: str):
+        try:
+            self.check_input_line(input_line)
+        except ValueError as exception:
+            print(exception)
+            return False
+        return True
+
+    # Simulate one input vector and return output response, without printing
+    def simulate_input(self, input_line: str):
         assert self.netlist != None
-        print(f"Simulation with input {input_line}")
+        self.check_input_line(input_line)
 
-        # Reset every net as unassigned
-        for net in self.netlist.nets_by_name.values():
-            net.assigned = False
+        for (input_net_id, value) in zip(self.compact_netlist.input_net_ids, input_line):
+            self.logic_values[input_net_id] = int(value)
 
-        # Reset every gate as unvisited
-        for gate in self.netlist.gates:
-            gate.visited = False
+        # Evaluate gates in levelized order to assign corresponding logical value to each output net
+        with profile_phase(self.profiler, "simulate"):
+            self.compact_netlist.simulate(self.logic_values, 1)
+        if self.profiler != None:
+            self.profiler.count("gate_evaluations", self.compact_netlist.num_gates)
+            self.profiler.count("simulated_vectors")
+        return "".join(str(self.logic_values[output_net_id]) for output_net_id in self.compact_netlist.output_net_ids)
 
-        # Create stack of gates for evaluation
-        gates_stack = []
+    # Read input vectors lazily from file or iterable and simulate them in batches of batch_size with bit-parallel simulation
+    # Yield output response of each input vector (packed into bytes if as_bytes is specified), so memory use does not grow with number of input vectors
+    def stream_simulations(self, input_source, batch_size: int = 64, as_bytes: bool = False):
+        assert self.netlist != None
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size {batch_size}")
 
-        # For each input bit in test
-        for i, value in enumerate(input_line):
-            # Check if user-defined logic value is valid, assign logical value to each input net, set input net as assigned
-            value = int(value)
-            if value not in [0, 1]:
-                print(f"Invalid input with value {value}")
-                return
-            input_net = self.netlist.input_nets[i]
-            input_net.logic_value = value
-            input_net.assigned = True
-            # Push unvisited gates that have all inputs assigned onto stack, set these gates as visited
-            for des_gate in input_net.des_gates:
-                if (not des_gate.visited) and des_gate.all_inputs_assigned():
-                    des_gate.visited = True
-                    gates_stack.append(des_gate)
-
-        # While stack still has gate(s) remaining
-        while len(gates_stack) > 0:
-            # Pop gate from stack
-            gate = gates_stack.pop()
-            # Evaluate gate to assign corresponding logical value to output net, set output net as assigned
-            gate.evaluate()
-            gate.out_net.assigned = True
-            # Push unevaluated gates that have all inputs assigned onto stack, set these gates as visited
-            for des_gate in gate.out_net.des_gates:
-                if (not des_gate.visited) and des_gate.all_inputs_assigned():
-                    des_gate.visited = True
-                    gates_stack.append(des_gate)
-
-        # Print output
-        print("Output: ", end='')
-        for output_net in self.netlist.output_nets:
-            print(f"{output_net.logic_value}", end='')
-        print("\n")
+        for input_lines in itertools.batched(read_input_lines(input_source), batch_size):
+            for input_line in input_lines:
+                self.check_input_line(input_line)
+            for output_response in self.run_parallel_simulation_with_inputs(list(input_lines)):
+                yield pack_bits(output_response) if as_bytes else output_response
+
+    # Read input vectors lazily from file or iterable and fault simulate them in batches of batch_size
+    # Yield set of faults detected by each input vector (all faults detected so far in cumulative fault simulation), without printing or writing results
+    def stream_fault_simulations(self, input_source, reset_detection: bool, engine: str = "deductive", drop_detected_faults: bool = False, batch_size: int = 64):
+        assert self.netlist != None
+        if engine not in fault_simulation_engines:
+            raise ValueError(f"Unknown fault simulation engine {engine}")
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size {batch_size}")
+
+        for input_lines in itertools.batched(read_input_lines(input_source), batch_size):
+            for input_line in input_lines:
+                self.check_input_line(input_line)
+            yield from self.run_fault_simulations_with_inputs(list(input_lines), reset_detection, None, None, engine, drop_detected_faults)
+
+    # Console layer: simulate one input vector, print output response and return it
+    def run_simulation_with_input(self, input_line: str):
+        assert self.netlist != None
+        print(f"Simulation with input {input_line}")
+
+        try:
+            output_response = self.simulate_input(input_line)
+        except ValueError as exception:
+            print(exception)
+            return
+
+        print(f"Output: {output_response}\n")
+        return output_response
 
     def run_simulations_with_file(self, test_filepath: str):
         assert self.netlist != None
         try:
-            with open(test_filepath, 'r') as file:
-                print(f"Start running circuit simulations with file {test_filepath}\n")
-                for file_line in file:
-                    self.run_simulation_with_input(file_line.strip())
-                print("Completed circuit simulations\n\n")
+            print(f"Start running circuit simulations with file {test_filepath}\n")
+            for input_line in read_input_lines(test_filepath):
+                self.run_simulation_with_input(input_line)
+            print("Completed circuit simulations\n\n")
         except FileNotFoundError:
             print(f"File {test_filepath} was not found!")
         except Exception as exception:
             print(f"Exception occurred: {exception}")
 
+
+    # Simulate all input vectors at once by packing them into one word per net (bit k belongs to input vector k)
+    def run_parallel_simulation_with_inputs(self, input_lines: list[str]):
+        assert self.netlist != None
+        num_vectors = len(input_lines)
+        mask = (1 << num_vectors) - 1
+
+        for input_line in input_lines:
+            try:
+                self.check_input_line(input_line)
+            except ValueError as exception:
+                print(exception)
+                return None
+
+        # Pack column i of the input vectors into the parallel value of input net i
+        for i, input_net_id in enumerate(self.compact_netlist.input_net_ids):
+            self.parallel_values[input_net_id] = int("".join(input_line[i] for input_line in reversed(input_lines)), 2) if num_vectors > 0 else 0
+
+        # Evaluate each gate once for all input vectors in levelized order
+        with profile_phase(self.profiler, "simulate"):
+            self.compact_netlist.simulate(self.parallel_values, mask)
+        if self.profiler != None:
+            self.profiler.count("gate_evaluations", self.compact_netlist.num_gates)
+            self.profiler.count("simulated_vectors", num_vectors)
+
+        # Unpack output nets' parallel values into one output response per input vector
+        output_columns = [format(self.parallel_values[output_net_id], f"0{num_vectors}b")[::-1] for output_net_id in self.compact_netlist.output_net_ids]
+        return ["".join(output_bits) for output_bits in zip(*output_columns)] if len(output_columns) > 0 else [""] * num_vectors
+
+    # Simulate input vectors from file in batches of batch_size vectors, return output responses in file order
+    def run_parallel_simulations_with_file(self, test_filepath: str, batch_size: int = 64):
+        assert self.netlist != None
+        output_responses = []
+        try:
+            print(f"Start running parallel circuit simulations with file {test_filepath}\n")
+            output_responses.extend(self.stream_simulations(test_filepath, batch_size))
+            print("Completed parallel circuit simulations\n\n")
+        except FileNotFoundError:
+            print(f"File {test_filepath} was not found!")
+        except ValueError as exception:
+            print(exception)
+            return None
+        except Exception as exception:
+            print(f"Exception occurred: {exception}")
+        return output_responses
     
     # If faults_filepath is not specified, simulate all faults in the net
     # If faults_filepath is specified, take faults from file for simulation
-    def place_stuck_at_faults(self, faults_filepath: str = None):
+    # If use_collapsing is specified, only simulate representative faults of equivalence classes, but report on every fault
+    # Dominance collapsing is not used here: a test for dominated fault may not detect dominating fault, so both keep their own fault IDs
+    def place_stuck_at_faults(self, faults_filepath: str = None, use_collapsing: bool = False):
         assert self.netlist != None
 
         if faults_filepath == None:
-            for net in self.netlist.nets_by_name.values():
-                net.stuck_at_values = {0, 1}
+            fault_keys = [(net_id, stuck_at_value) for net_id in range(self.compact_netlist.num_nets) for stuck_at_value in [0, 1]]
         else:
-            # Reset all nets' stuck-at values
-            for net in self.netlist.nets_by_name.values():
-                net.stuck_at_values = set()
-
+            fault_keys = []
             try:
                 with open(faults_filepath, "r") as file:
                     for line in file:
                         line_info = line.strip().split()
                         if (len(line_info) == 2):
-                            net_name = int(line_info[0])
+                            net_name = parse_net_name(line_info[0])
+                            net_id = self.compact_netlist.get_net_id(net_name)
                             stuck_at_value = int(line_info[1])
-                            self.netlist.nets_by_name.get(net_name).stuck_at_values.add(stuck_at_value)
+                            if net_id == None:
+                                raise ValueError(f"Net {net_name} not found")
+                            if stuck_at_value not in [0, 1]:
+                                raise ValueError(f"Invalid stuck-at value {stuck_at_value} of net {net_name}")
+                            fault_keys.append((net_id, stuck_at_value))
             
             except FileNotFoundError:
                 print(f"File {faults_filepath} was not found!")
             except Exception as exception:
                 print(f"Exception occurred: {exception}")
 
-    # Reset all nets' fault lists
-    def reset_detected_faults(self):
+        fault_classes = None
+        if use_collapsing:
+            net_names = self.compact_netlist.net_names
+            placed_faults = [(net_names[net_id], stuck_at_value) for (net_id, stuck_at_value) in sorted(set(fault_keys))]
+            (representative_faults, representative_of) = self.netlist.collapse_faults(placed_faults)
+            fault_classes = {}
+            for fault in placed_faults:
+                fault_classes.setdefault(representative_of[fault], []).append(fault)
+            # Keep only representative faults in simulation
+            fault_keys = self.get_fault_keys(representative_faults)
+
+        self.assign_fault_ids(fault_keys, fault_classes)
+
+    # Place given (representative) faults only, where fault_classes maps each of them to the faults it represents
+    def place_stuck_at_fault_list(self, faults: list[tuple[int, int]], fault_classes: dict = None):
         assert self.netlist != None
-        for net in self.netlist.nets_by_name.values():
-            net.faults = set()
+        self.assign_fault_ids(self.get_fault_keys(faults), fault_classes)
+
+    # (net ID, stuck-at value) of each (net name, stuck-at value) fault
+    def get_fault_keys(self, faults: list[tuple[int, int]]):
+        return [(self.compact_netlist.get_net_id(net_name), stuck_at_value) for (net_name, stuck_at_value) in faults]
+
+    # Give every placed stuck-at fault, given as (net ID, stuck-at value), a dense integer ID, so fault lists can be kept as bitmasks of fault IDs
+    # Fault IDs follow net IDs, then stuck-at values
+    # fault_ids[v][n] is the ID of stuck-at-v fault of net n (-1 if that fault is not placed or is dropped),
+    # and its bit 1 << ID is only built where the fault is injected
+    # If fault_classes is specified, detecting a (representative) fault also detects every fault in its class
+    def assign_fault_ids(self, fault_keys: list[tuple[int, int]] = [], fault_classes: dict = None):
+        assert self.netlist != None
+        compact_netlist = self.compact_netlist
+        fault_keys = sorted(set(fault_keys))
+        self.fault_ids = [array("i", [-1]) * compact_netlist.num_nets, array("i", [-1]) * compact_netlist.num_nets]
+        self.fault_net_ids = array("i", (net_id for (net_id, _) in fault_keys))
+        self.faults_by_id = [(compact_netlist.net_names[net_id], stuck_at_value) for (net_id, stuck_at_value) in fault_keys]
+        self.fault_classes_by_id = [fault_classes.get(fault, [fault]) if fault_classes != None else [fault] for fault in self.faults_by_id]
+        for (fault_id, (net_id, stuck_at_value)) in enumerate(fault_keys):
+            self.fault_ids[stuck_at_value][net_id] = fault_id
+
+        # Faults detected so far and fault lists kept by event-driven fault simulation refer to previous fault IDs
+        self.dropped_faults = 0
+        self.is_event_state_valid = False
+        self.reset_detected_faults()
+
+    # Bit of stuck-at fault of net in fault lists, 0 if that fault is not placed or is dropped
+    def get_fault_bit(self, net_id: int, stuck_at_value: int):
+        fault_id = self.fault_ids[stuck_at_value][net_id]
+        return 1 << fault_id if fault_id >= 0 else 0
+
+    # Map each placed (representative) fault to faults it represents
+    def get_fault_classes(self):
+        return {fault: fault_class for (fault, fault_class) in zip(self.faults_by_id, self.fault_classes_by_id)}
+
+    # Translate bitmask of fault IDs back to set of (net name, stuck-at value) faults, including faults collapsed into them
+    def decode_faults(self, faults_mask: int):
+        return {fault for fault_id in bit_positions(faults_mask) for fault in self.fault_classes_by_id[fault_id]}
+
+    # Reset all nets' fault lists (event-driven fault simulation resets its own fault lists once its state is invalid)
+    def reset_fault_lists(self):
+        assert self.netlist != None
+        self.fault_lists = [0] * self.compact_netlist.num_nets
+
+    # Reset all nets' fault lists and all faults detected so far, put dropped faults back into simulation
+    def reset_detected_faults(self):
+        self.reset_fault_lists()
+        self.restore_dropped_faults()
+        self.reset_detection_record()
+
+    def reset_detection_record(self):
+        self.detected_faults = 0
+        self.first_detecting_vectors = {}
+        self.num_simulated_vectors = 0
+
+    # Remove faults from simulation so they are no longer injected or propagated
+    def drop_faults(self, faults_mask: int):
+        for fault_id in bit_positions(faults_mask):
+            (_, stuck_at_value) = self.faults_by_id[fault_id]
+            self.fault_ids[stuck_at_value][self.fault_net_ids[fault_id]] = -1
+        self.dropped_faults |= faults_mask
+
+        # Dropped faults must also leave fault lists kept across input vectors by event-driven fault simulation
+        if self.is_event_state_valid and faults_mask != 0:
+            self.event_fault_lists = [fault_list & ~faults_mask for fault_list in self.event_fault_lists]
+
+    def restore_dropped_faults(self):
+        if self.dropped_faults != 0:
+            self.is_event_state_valid = False
+        for fault_id in bit_positions(self.dropped_faults):
+            (_, stuck_at_value) = self.faults_by_id[fault_id]
+            self.fault_ids[stuck_at_value][self.fault_net_ids[fault_id]] = fault_id
+        self.dropped_faults = 0
+
+    # Record faults detected by one input vector in cumulative fault simulation, return mask of all faults detected so far
+    def accumulate_detected_faults(self, detected_faults_mask: int, drop_detected_faults: bool):
+        newly_detected_faults_mask = detected_faults_mask & ~self.detected_faults
+        for fault_id in bit_positions(newly_detected_faults_mask):
+            for fault in self.fault_classes_by_id[fault_id]:
+                self.first_detecting_vectors[fault] = self.num_simulated_vectors
+        self.detected_faults |= newly_detected_faults_mask
+        self.num_simulated_vectors += 1
+
+        if drop_detected_faults:
+            self.drop_faults(newly_detected_faults_mask)
+        return self.detected_faults
 
     # If output_filepath is specified, print results and write results into file specified
-    def run_fault_simulation_with_input(self, input_line: str, reset_detection: bool, circuit_name: str, output_filepath: str = None):
+    # If drop_detected_faults is specified in cumulative fault simulation, faults detected are no longer simulated for next input vectors
+    def run_fault_simulation_with_input(self, input_line: str, reset_detection: bool, circuit_name: str, output_filepath: str = None, drop_detected_faults: bool = False):
         assert self.netlist != None
         
         if (reset_detection):
             self.reset_detected_faults()
+        else:
+            self.reset_fault_lists()
+
+        if not self.is_valid_input_line(input_line):
+            return
+
+        for (input_net_id, value) in zip(self.compact_netlist.input_net_ids, input_line):
+            self.logic_values[input_net_id] = int(value)
+
+        detected_faults_mask = self.propagate_detected_faults()
+        if detected_faults_mask == None:
+            return
+
+        # In cumulative fault simulation, keep faults detected by previous input vectors
+        if not reset_detection:
+            detected_faults_mask = self.accumulate_detected_faults(detected_faults_mask, drop_detected_faults)
+        detected_faults = self.decode_faults(detected_faults_mask)
+
+        if output_filepath != None:
+            self.write_detected_faults(input_line, detected_faults, reset_detection, circuit_name, output_filepath)
+        
+        return detected_faults
 
-        # Reset every net as unassigned
-        for net in self.netlist.nets_by_name.values():
-            net.assigned = False
+    # Deductive fault simulation of input vector whose values are already set on input nets
+    # Return mask of faults reaching an output net, or None if some gate is not supported
+    def propagate_detected_faults(self):
+        # Find fault of each input net
+        for input_net_id in self.compact_netlist.input_net_ids:
+            self.fault_lists[input_net_id] = self.get_fault_bit(input_net_id, self.logic_values[input_net_id] ^ 1)
 
-        # Reset every gate as unvisited
-        for gate in self.netlist.gates:
-            gate.visited = False
+        # Propagate faults to output net of each gate in levelized order
+        with profile_phase(self.profiler, "propagate"):
+            valid = self.compact_netlist.propagate_fault_lists(self.logic_values, self.fault_lists, self.fault_ids)
+        if not valid:
+            return None
+        if self.profiler != None:
+            # Each gate combines fault list of each input net once, then adds fault of its output net
+            self.profiler.count("gate_evaluations", self.compact_netlist.num_gates)
+            self.profiler.count("fault_set_operations", len(self.compact_netlist.fanin_net_ids) + self.compact_netlist.num_gates)
+            self.profiler.count("simulated_vectors")
+            self.profiler.record_fault_list_size(max(fault_list.bit_count() for fault_list in self.fault_lists))
 
-        # Create stack of gates for fault propagation
-        gates_stack = []
+        detected_faults_mask = 0
+        for output_net_id in self.compact_netlist.output_net_ids:
+            detected_faults_mask |= self.fault_lists[output_net_id]
+        return detected_faults_mask
 
-        # For each input bit in test
-        for i, value in enumerate(input_line):
-            # Check if user-defined logical value is valid, find fault of each input net, set input net as assigned
+    # Event-driven deductive fault simulation: good values and fault lists are kept from previous input vector,
+    # and only gates reached by a change in good value or fault list are re-evaluated, each with the same rule as deductive fault simulation
+    # Gates are scheduled in buckets by level, so consecutive input vectors differing in a few bits only re-evaluate the gates those bits reach
+    def run_event_driven_fault_simulation_with_input(self, input_line: str, reset_detection: bool, circuit_name: str, output_filepath: str = None, drop_detected_faults: bool = False):
+        assert self.netlist != None
+        compact_netlist = self.compact_netlist
+
+        if (reset_detection):
+            self.restore_dropped_faults()
+            self.reset_detection_record()
+
+        if not self.is_valid_input_line(input_line):
+            return
+
+        # Gates scheduled on each level, each gate at most once
+        levels = compact_netlist.levels
+        level_gate_ids = [[] for _ in range(compact_netlist.max_level + 1)]
+        is_scheduled = bytearray(compact_netlist.num_gates)
+
+        def schedule_fanout(net_id: int):
+            for des_gate_id in compact_netlist.get_fanout(net_id):
+                if not is_scheduled[des_gate_id]:
+                    is_scheduled[des_gate_id] = 1
+                    level_gate_ids[levels[des_gate_id]].append(des_gate_id)
+
+        # Without state from previous input vector, every gate has to be evaluated
+        if not self.is_event_state_valid:
+            self.event_fault_lists = [0] * compact_netlist.num_nets
+            for gate_id in compact_netlist.levelized_gate_ids:
+                level_gate_ids[levels[gate_id]].append(gate_id)
+            is_scheduled = bytearray(b"\x01") * compact_netlist.num_gates
+        (values, fault_lists) = (self.event_values, self.event_fault_lists)
+
+        # Schedule fanout gates of input nets whose good value or fault list changed
+        for (input_net_id, value) in zip(compact_netlist.input_net_ids, input_line):
             value = int(value)
-            if value not in [0, 1]:
-                print(f"Invalid input with value {value}")
-                return
-            input_net = self.netlist.input_nets[i]
-            input_net.logic_value = value
-            matching_stuck_at_value = int(not value)
-            if matching_stuck_at_value in input_net.stuck_at_values:
-                input_net.faults.add((input_net.name, matching_stuck_at_value))
-            input_net.assigned = True
-            # Push unvisited gates that have all inputs assigned onto stack, set these gates as visited
-            for des_gate in input_net.des_gates:
-                if (not des_gate.visited) and des_gate.all_inputs_assigned():
-                    des_gate.visited = True
-                    gates_stack.append(des_gate)
-
-        # While stack still has gate(s) remaining
-        while len(gates_stack) > 0:
-            # Pop gate from stack
-            gate = gates_stack.pop()
-            # Propagate faults to output net, set output net as assigned
-            valid = gate.perform_fault_list_propagation()
-            if not valid:
-                return
-            gate.out_net.assigned = True
-            # Push unevaluated gates that have all inputs assigned onto stack, set these gates as visited
-            for des_gate in gate.out_net.des_gates:
-                if (not des_gate.visited) and des_gate.all_inputs_assigned():
-                    des_gate.visited = True
-                    gates_stack.append(des_gate)
+            in_faults = self.get_fault_bit(input_net_id, value ^ 1)
+            if (value != values[input_net_id] or in_faults != fault_lists[input_net_id]):
+                values[input_net_id] = value
+                fault_lists[input_net_id] = in_faults
+                schedule_fanout(input_net_id)
+
+        # Re-evaluate scheduled gates level by level, scheduling fanout gates only when output net changes
+        with profile_phase(self.profiler, "propagate"):
+            for gate_ids in level_gate_ids:
+                for gate_id in gate_ids:
+                    (logic_value, out_faults) = compact_netlist.evaluate_fault_list(gate_id, values, fault_lists)
+                    out_net_id = compact_netlist.out_net_ids[gate_id]
+                    out_faults |= self.get_fault_bit(out_net_id, logic_value ^ 1)
+                    if (logic_value == values[out_net_id] and out_faults == fault_lists[out_net_id]):
+                        continue
+                    values[out_net_id] = logic_value
+                    fault_lists[out_net_id] = out_faults
+                    schedule_fanout(out_net_id)
+        self.is_event_state_valid = True
+        if self.profiler != None:
+            # Every gate scheduled is evaluated once, as in deductive fault simulation
+            evaluated_gate_ids = [gate_id for gate_ids in level_gate_ids for gate_id in gate_ids]
+            self.profiler.count("gate_evaluations", len(evaluated_gate_ids))
+            self.profiler.count("fault_set_operations", sum(compact_netlist.fanin_offsets[gate_id + 1] - compact_netlist.fanin_offsets[gate_id] for gate_id in evaluated_gate_ids) + len(evaluated_gate_ids))
+            self.profiler.count("simulated_vectors")
+            self.profiler.record_fault_list_size(max(fault_list.bit_count() for fault_list in fault_lists))
+
+        detected_faults_mask = 0
+        for output_net_id in compact_netlist.output_net_ids:
+            detected_faults_mask |= fault_lists[output_net_id]
+
+        # In cumulative fault simulation, keep faults detected by previous input vectors
+        if not reset_detection:
+            detected_faults_mask = self.accumulate_detected_faults(detected_faults_mask, drop_detected_faults)
+        detected_faults = self.decode_faults(detected_faults_mask)
+
+        if output_filepath != None:
+            self.write_detected_faults(input_line, detected_faults, reset_detection, circuit_name, output_filepath)
+
+        return detected_faults
 
-        detected_faults = set()
-        for output_net in self.netlist.output_nets:
-            detected_faults = detected_faults.union(output_net.faults)
+    # Critical path tracing: after one good-machine pass, trace critical nets (whose flip changes an output net) backward from output nets
+    # Stuck-at fault opposite to good value of a critical net is detected
+    def run_critical_path_tracing_with_input(self, input_line: str, reset_detection: bool, circuit_name: str, output_filepath: str = None, drop_detected_faults: bool = False):
+        assert self.netlist != None
+        compact_netlist = self.compact_netlist
+
+        if (reset_detection):
+            self.reset_detected_faults()
+
+        if not self.is_valid_input_line(input_line):
+            return
+
+        for (input_net_id, value) in zip(compact_netlist.input_net_ids, input_line):
+            self.logic_values[input_net_id] = int(value)
+
+        with profile_phase(self.profiler, "simulate"):
+            compact_netlist.simulate(self.logic_values, 1)
+        if self.profiler != None:
+            self.profiler.count("gate_evaluations", compact_netlist.num_gates)
+
+        with profile_phase(self.profiler, "propagate"):
+            critical_nets = self.trace_critical_nets()
+        if self.profiler != None:
+            self.profiler.count("simulated_vectors")
+        detected_faults_mask = 0
+        for net_id in range(compact_netlist.num_nets):
+            if critical_nets[net_id] == 1:
+                detected_faults_mask |= self.get_fault_bit(net_id, self.logic_values[net_id] ^ 1)
+
+        # In cumulative fault simulation, keep faults detected by previous input vectors
+        if not reset_detection:
+            detected_faults_mask = self.accumulate_detected_faults(detected_faults_mask, drop_detected_faults)
+        detected_faults = self.decode_faults(detected_faults_mask)
 
         if output_filepath != None:
-            sorted_detected_faults = sorted(detected_faults, key = lambda fault: fault[0])
-            # Print and write output
+            self.write_detected_faults(input_line, detected_faults, reset_detection, circuit_name, output_filepath)
+
+        return detected_faults
+
+    # Return criticality of each net indexed by net ID (1 if critical, 0 otherwise), good values being already simulated
+    # Nets are decided in one pass from highest level down, each one after every net in its fanout; a stem whose analysis runs over
+    # stem_analysis_budget gate evaluations is left undecided, and so are nets taking its criticality, until flips of all such stems
+    # are propagated at once in parallel (one bit per stem) at the end of the pass
+    def trace_critical_nets(self):
+        compact_netlist = self.compact_netlist
+        (fanout_offsets, fanout_gate_ids, out_net_ids) = (compact_netlist.fanout_offsets, compact_netlist.fanout_gate_ids, compact_netlist.out_net_ids)
+        is_output_net = bytearray(compact_netlist.num_nets)
+        for output_net_id in compact_netlist.output_net_ids:
+            is_output_net[output_net_id] = 1
+
+        # Criticality of each net (-1 while unknown), and for undecided nets, stem left to parallel flip propagation whose criticality they take
+        critical_nets = array("b", [-1]) * compact_netlist.num_nets
+        deciding_stem_ids = array("i", [-1]) * compact_netlist.num_nets
+        fallback_stem_ids = []
+        num_stems = 0
+        for net_id in itertools.chain((out_net_ids[gate_id] for gate_id in reversed(compact_netlist.levelized_gate_ids)), compact_netlist.input_net_ids):
+            num_fanouts = fanout_offsets[net_id + 1] - fanout_offsets[net_id]
+            if is_output_net[net_id]:
+                critical_nets[net_id] = 1
+            elif num_fanouts == 1:
+                # Fanout-free net is critical if its only destination gate is sensitive to it and has critical output net
+                des_gate_id = fanout_gate_ids[fanout_offsets[net_id]]
+                des_out_net_id = out_net_ids[des_gate_id]
+                if not compact_netlist.is_sensitive_to_input(des_gate_id, net_id, self.logic_values):
+                    critical_nets[net_id] = 0
+                elif deciding_stem_ids[des_out_net_id] >= 0:
+                    deciding_stem_ids[net_id] = deciding_stem_ids[des_out_net_id]
+                else:
+                    critical_nets[net_id] = critical_nets[des_out_net_id]
+            elif num_fanouts > 1:
+                num_stems += 1
+                (is_critical, deciding_stem_id) = self.is_critical_stem(net_id, is_output_net, critical_nets, deciding_stem_ids)
+                if is_critical == None:
+                    deciding_stem_ids[net_id] = deciding_stem_id
+                    if deciding_stem_id == net_id:
+                        fallback_stem_ids.append(net_id)
+                else:
+                    critical_nets[net_id] = is_critical
+            else:
+                critical_nets[net_id] = 0
+
+        if len(fallback_stem_ids) > 0:
+            observed_masks = self.propagate_root_flips_parallel(dict.fromkeys(fallback_stem_ids, 1), self.logic_values, 1)
+            for stem_net_id in fallback_stem_ids:
+                critical_nets[stem_net_id] = observed_masks[stem_net_id]
+            for net_id in range(compact_netlist.num_nets):
+                if deciding_stem_ids[net_id] >= 0:
+                    critical_nets[net_id] = critical_nets[deciding_stem_ids[net_id]]
+        if self.profiler != None:
+            self.profiler.count("stems", num_stems)
+            self.profiler.count("stem_fallbacks", len(fallback_stem_ids))
+        return critical_nets
+
+    # Stem analysis: flip fanout stem and propagate the flip in levelized order until it reaches an output net or dies out
+    # Propagation stops early once the flip converges to a single net whose criticality is already known (such as stem's dominator)
+    # or taken from a stem left undecided, whose criticality the stem then takes too
+    # Flipped values are written over good values and restored before returning
+    # Return (criticality, -1), or (None, stem deciding criticality), the stem itself once its analysis runs over stem_analysis_budget gate evaluations
+    def is_critical_stem(self, stem_net_id: int, is_output_net: bytearray, critical_nets: array, deciding_stem_ids: array):
+        compact_netlist = self.compact_netlist
+        (fanout_offsets, out_net_ids, levels, values) = (compact_netlist.fanout_offsets, compact_netlist.out_net_ids, compact_netlist.levels, self.logic_values)
+        # Good values of flipped nets
+        good_values = {stem_net_id: values[stem_net_id]}
+        values[stem_net_id] ^= 1
+        pending_fanouts_counts = {stem_net_id: fanout_offsets[stem_net_id + 1] - fanout_offsets[stem_net_id]}
+        gates_heap = []
+        scheduled_gates = set()
+        for des_gate_id in compact_netlist.get_fanout(stem_net_id):
+            if des_gate_id not in scheduled_gates:
+                scheduled_gates.add(des_gate_id)
+                heapq.heappush(gates_heap, (levels[des_gate_id], des_gate_id))
+
+        (is_critical, deciding_stem_id) = (False, -1)
+        num_evaluations = 0
+        while len(gates_heap) > 0:
+            if num_evaluations == self.stem_analysis_budget:
+                (is_critical, deciding_stem_id) = (None, stem_net_id)
+                break
+            num_evaluations += 1
+            (_, gate_id) = heapq.heappop(gates_heap)
+            for in_net_id in compact_netlist.get_fanin(gate_id):
+                if in_net_id in pending_fanouts_counts:
+                    pending_fanouts_counts[in_net_id] -= 1
+                    if pending_fanouts_counts[in_net_id] == 0:
+                        del pending_fanouts_counts[in_net_id]
+
+            out_net_id = out_net_ids[gate_id]
+            flipped_value = compact_netlist.evaluate(gate_id, values, 1)
+            if flipped_value != values[out_net_id]:
+                if is_output_net[out_net_id]:
+                    is_critical = True
+                    break
+                good_values[out_net_id] = values[out_net_id]
+                values[out_net_id] = flipped_value
+                if fanout_offsets[out_net_id + 1] > fanout_offsets[out_net_id]:
+                    pending_fanouts_counts[out_net_id] = fanout_offsets[out_net_id + 1] - fanout_offsets[out_net_id]
+                for des_gate_id in compact_netlist.get_fanout(out_net_id):
+                    if des_gate_id not in scheduled_gates:
+                        scheduled_gates.add(des_gate_id)
+                        heapq.heappush(gates_heap, (levels[des_gate_id], des_gate_id))
+
+            # If only one flipped net has fanout left and none of its fanout is evaluated yet,
+            # flipping stem is the same as flipping that net alone
+            if len(pending_fanouts_counts) == 1:
+                (live_net_id,) = pending_fanouts_counts
+                if pending_fanouts_counts[live_net_id] == fanout_offsets[live_net_id + 1] - fanout_offsets[live_net_id]:
+                    if critical_nets[live_net_id] >= 0:
+                        is_critical = critical_nets[live_net_id] == 1
+                        break
+                    if deciding_stem_ids[live_net_id] >= 0:
+                        (is_critical, deciding_stem_id) = (None, deciding_stem_ids[live_net_id])
+                        break
+
+        for (net_id, good_value) in good_values.items():
+            values[net_id] = good_value
+        if self.profiler != None:
+            self.profiler.count("gate_evaluations", num_evaluations)
+        return (is_critical, deciding_stem_id)
+
+    # Parallel-pattern single-fault propagation: simulate good machine for a word of ppsfp_word_size input vectors at once,
+    # then inject each fault and re-evaluate only its fanout cone until the fault effect dies out
+    # In cumulative fault simulation, faults detected by earlier input vectors (in earlier words or before this run) are not simulated again
+    def run_ppsfp_fault_simulation_with_inputs(self, input_lines: list[str], reset_detection: bool, circuit_name: str, output_filepath: str = None, drop_detected_faults: bool = False):
+        assert self.netlist != None
+
+        if (reset_detection):
+            self.reset_detected_faults()
+
+        for input_line in input_lines:
+            if not self.is_valid_input_line(input_line):
+                return None
+
+        all_detected_faults = []
+        for word_start in range(0, len(input_lines), self.ppsfp_word_size):
+            word_input_lines = input_lines[word_start:word_start + self.ppsfp_word_size]
+            self.run_parallel_simulation_with_inputs(word_input_lines)
+
+            # Faults still simulated: placed faults not dropped, and in cumulative fault simulation, not detected so far
+            is_detected = bytearray(len(self.faults_by_id))
+            if not reset_detection:
+                for fault_id in bit_positions(self.detected_faults):
+                    is_detected[fault_id] = 1
+            simulated_faults = [(fault_id, net_id, stuck_at_value) for (fault_id, (net_id, (_, stuck_at_value))) in enumerate(zip(self.fault_net_ids, self.faults_by_id))
+                                if (self.fault_ids[stuck_at_value][net_id] == fault_id and not is_detected[fault_id])]
+
+            # IDs of faults detected by each input vector of word
+            with profile_phase(self.profiler, "propagate"):
+                detected_fault_ids = self.propagate_faults_parallel(simulated_faults, len(word_input_lines))
+
+            for (input_line, fault_ids) in zip(word_input_lines, detected_fault_ids):
+                detected_faults_mask = mask_of_bit_positions(fault_ids, len(self.faults_by_id))
+                # In cumulative fault simulation, keep faults detected by previous input vectors
+                if not reset_detection:
+                    detected_faults_mask = self.accumulate_detected_faults(detected_faults_mask, drop_detected_faults)
+                detected_faults = self.decode_faults(detected_faults_mask)
+                if output_filepath != None:
+                    self.write_detected_faults(input_line, detected_faults, reset_detection, circuit_name, output_filepath)
+                all_detected_faults.append(detected_faults)
+        return all_detected_faults
+
+    # Propagate each (fault ID, net ID, stuck-at value) fault over input vectors of last parallel simulation,
+    # return list of IDs of faults detected by each input vector
+    # Within its fanout-free region, a fault effect reaches the region's root for input vectors where every gate on its path to the root
+    # is sensitized by good values, so only flips of roots are propagated further, once for all faults of the region
+    def propagate_faults_parallel(self, faults: list[tuple[int, int, int]], num_vectors: int):
+        compact_netlist = self.compact_netlist
+        (fanin_offsets, fanin_net_ids, gate_operations, out_net_ids) = (compact_netlist.fanin_offsets, compact_netlist.fanin_net_ids, compact_netlist.gate_operations, compact_netlist.out_net_ids)
+        (and_operation, or_operation) = (GateOperation.AND.value, GateOperation.OR.value)
+        parallel_values = self.parallel_values
+        mask = (1 << num_vectors) - 1
+        fanout_free_roots = compact_netlist.get_fanout_free_roots()
+
+        # Input vectors for which flipping net flips root of its fanout-free region
+        sensitized_masks = [mask] * compact_netlist.num_nets
+        for gate_id in reversed(compact_netlist.levelized_gate_ids):
+            start = fanin_offsets[gate_id]
+            end = fanin_offsets[gate_id + 1]
+            operation = gate_operations[gate_id]
+            out_net_sensitized_mask = sensitized_masks[out_net_ids[gate_id]]
+            for i in range(start, end):
+                in_net_id = fanin_net_ids[i]
+                if fanout_free_roots[in_net_id] == in_net_id:
+                    continue
+                # Other input nets at non-controlling value let the flip through (XOR gates, buffers and inverters always do)
+                sensitized_mask = out_net_sensitized_mask
+                if (operation == and_operation):
+                    for j in range(start, end):
+                        if j != i:
+                            sensitized_mask &= parallel_values[fanin_net_ids[j]]
+                elif (operation == or_operation):
+                    for j in range(start, end):
+                        if j != i:
+                            sensitized_mask &= ~parallel_values[fanin_net_ids[j]]
+                sensitized_masks[in_net_id] = sensitized_mask
+
+        # Input vectors for which each fault is activated (good value differing from stuck-at value) and reaches root of its region,
+        # and flips of each root needed by all faults of its region
+        reaching_faults = []
+        root_flip_masks = {}
+        for (fault_id, faulty_net_id, stuck_at_value) in faults:
+            reaching_mask = (parallel_values[faulty_net_id] ^ (mask if stuck_at_value == 1 else 0)) & sensitized_masks[faulty_net_id]
+            if reaching_mask != 0:
+                root_net_id = fanout_free_roots[faulty_net_id]
+                reaching_faults.append((fault_id, root_net_id, reaching_mask))
+                root_flip_masks[root_net_id] = root_flip_masks.get(root_net_id, 0) | reaching_mask
+
+        observed_masks = self.propagate_root_flips_parallel(root_flip_masks, parallel_values, num_vectors)
+
+        detected_fault_ids = [[] for _ in range(num_vectors)]
+        for (fault_id, root_net_id, reaching_mask) in reaching_faults:
+            for vector_index in bit_positions(reaching_mask & observed_masks[root_net_id]):
+                detected_fault_ids[vector_index].append(fault_id)
+        return detected_fault_ids
+
+    # Propagate flip of each root net separately, given as word of num_vectors bits over good values of nets (words of num_vectors bits),
+    # return word of bits for which flipping each root flips an output net, by root net ID
+    # Flips of a group of roots are propagated at once, root k of group taking bits k * num_vectors to (k + 1) * num_vectors - 1 of values,
+    # where good values are repeated for every root of group; roots of a group are on close levels, so their fanout cones mostly overlap
+    # Each group is sized to the fanout cone of the previous one (gates it evaluated), since roots are taken from lowest to highest level
+    def propagate_root_flips_parallel(self, root_flip_masks: dict, good_values: list[int], num_vectors: int):
+        compact_netlist = self.compact_netlist
+        mask = (1 << num_vectors) - 1
+        src_gate_ids = compact_netlist.src_gate_ids
+        root_net_ids = sorted(root_flip_masks, key = lambda root_net_id: compact_netlist.levels[src_gate_ids[root_net_id]] if src_gate_ids[root_net_id] >= 0 else 0)
+        self.ppsfp_values = [None] * compact_netlist.num_nets
+        self.is_output_net = bytearray(compact_netlist.num_nets)
+        for output_net_id in compact_netlist.output_net_ids:
+            self.is_output_net[output_net_id] = 1
+        self.level_gate_ids = [[] for _ in range(compact_netlist.max_level + 1)]
+        self.level_expiring_net_ids = [[] for _ in range(compact_netlist.max_level + 1)]
+        self.is_scheduled_gate = bytearray(compact_netlist.num_gates)
+        observed_masks = {}
+        cone_size = compact_netlist.num_gates
+        group_start = 0
+        while group_start < len(root_net_ids):
+            group_size = max(1, min(self.ppsfp_lane_bits, self.ppsfp_cone_bits // max(1, cone_size)) // num_vectors)
+            group_root_net_ids = root_net_ids[group_start:group_start + group_size]
+            group_size = len(group_root_net_ids)
+            group_start += group_size
+            flips = {root_net_id: root_flip_masks[root_net_id] << (k * num_vectors) for (k, root_net_id) in enumerate(group_root_net_ids)}
+            repeating_word = ((1 << (group_size * num_vectors)) - 1) // mask
+            (observed_word, cone_size) = self.propagate_flips_parallel(flips, (1 << (group_size * num_vectors)) - 1, repeating_word, good_values)
+            for (k, root_net_id) in enumerate(group_root_net_ids):
+                observed_masks[root_net_id] = (observed_word >> (k * num_vectors)) & mask
+        self.ppsfp_values = None
+        return observed_masks
+
+    # Flip good values of nets by given flip words (where mask covers every bit) and return word of bits for which an output net flips,
+    # with number of gates evaluated
+    # Only gates with an input net flipped are evaluated, level by level, so propagation stops where no bit differs from good values
+    # Good values are repeated (multiplied by repeating_word) only for nets these gates read, and values of a net are
+    # dropped once the last level reading it is evaluated, so values of only a cut of the fanout cone are kept at once
+    # Same as evaluate for each gate, inlined since this loop runs once per group of fanout-free regions
+    def propagate_flips_parallel(self, flips: dict, mask: int, repeating_word: int, good_values: list[int]):
+        compact_netlist = self.compact_netlist
+        (fanin_offsets, fanin_net_ids, gate_operations, gate_inversions, out_net_ids) = (compact_netlist.fanin_offsets, compact_netlist.fanin_net_ids, compact_netlist.gate_operations, compact_netlist.gate_inversions, compact_netlist.out_net_ids)
+        (fanout_offsets, fanout_gate_ids, levels) = (compact_netlist.fanout_offsets, compact_netlist.fanout_gate_ids, compact_netlist.levels)
+        last_reading_levels = compact_netlist.get_last_reading_levels()
+        (and_operation, or_operation, xor_operation) = (GateOperation.AND.value, GateOperation.OR.value, GateOperation.XOR.value)
+        (values, is_output_net, level_gate_ids, level_expiring_net_ids, is_scheduled) = (self.ppsfp_values, self.is_output_net, self.level_gate_ids, self.level_expiring_net_ids, self.is_scheduled_gate)
+
+        (level, end_level) = (compact_netlist.max_level + 1, 0)
+        observed_word = 0
+        for (flipped_net_id, flip) in flips.items():
+            values[flipped_net_id] = (good_values[flipped_net_id] * repeating_word) ^ flip
+            level_expiring_net_ids[last_reading_levels[flipped_net_id]].append(flipped_net_id)
+            if is_output_net[flipped_net_id]:
+                observed_word |= flip
+            for i in range(fanout_offsets[flipped_net_id], fanout_offsets[flipped_net_id + 1]):
+                des_gate_id = fanout_gate_ids[i]
+                if not is_scheduled[des_gate_id]:
+                    is_scheduled[des_gate_id] = 1
+                    level_gate_ids[levels[des_gate_id]].append(des_gate_id)
+                    level = min(level, levels[des_gate_id])
+                    end_level = max(end_level, levels[des_gate_id])
+
+        num_evaluations = 0
+        while level <= end_level:
+            gate_ids = level_gate_ids[level]
+            for gate_id in gate_ids:
+                is_scheduled[gate_id] = 0
+                start = fanin_offsets[gate_id]
+                end = fanin_offsets[gate_id + 1]
+                for i in range(start, end):
+                    in_net_id = fanin_net_ids[i]
+                    if values[in_net_id] == None:
+                        values[in_net_id] = good_values[in_net_id] * repeating_word
+                        level_expiring_net_ids[last_reading_levels[in_net_id]].append(in_net_id)
+                result = values[fanin_net_ids[start]]
+                operation = gate_operations[gate_id]
+                if (operation == and_operation):
+                    for i in range(start + 1, end):
+                        result &= values[fanin_net_ids[i]]
+                elif (operation == or_operation):
+                    for i in range(start + 1, end):
+                        result |= values[fanin_net_ids[i]]
+                elif (operation == xor_operation):
+                    for i in range(start + 1, end):
+                        result ^= values[fanin_net_ids[i]]
+                if gate_inversions[gate_id]:
+                    result ^= mask
+
+                # Flipped net keeps its flip whatever flips of other roots do to it
+                out_net_id = out_net_ids[gate_id]
+                if out_net_id in flips:
+                    result ^= flips[out_net_id]
+                else:
+                    level_expiring_net_ids[last_reading_levels[out_net_id]].append(out_net_id)
+                values[out_net_id] = result
+                good_value = good_values[out_net_id] * repeating_word
+                if result == good_value:
+                    continue
+                if is_output_net[out_net_id]:
+                    observed_word |= result ^ good_value
+                for i in range(fanout_offsets[out_net_id], fanout_offsets[out_net_id + 1]):
+                    des_gate_id = fanout_gate_ids[i]
+                    if not is_scheduled[des_gate_id]:
+                        is_scheduled[des_gate_id] = 1
+                        level_gate_ids[levels[des_gate_id]].append(des_gate_id)
+                        if levels[des_gate_id] > end_level:
+                            end_level = levels[des_gate_id]
+            num_evaluations += len(gate_ids)
+            gate_ids.clear()
+            for net_id in level_expiring_net_ids[level]:
+                values[net_id] = None
+            level_expiring_net_ids[level].clear()
+            level += 1
+
+        # Values of nets whose last reading level is not evaluated (below first level evaluated or above propagation end) are dropped too
+        for expiring_net_ids in level_expiring_net_ids:
+            for net_id in expiring_net_ids:
+                values[net_id] = None
+            expiring_net_ids.clear()
+        if self.profiler != None:
+            self.profiler.count("gate_evaluations", num_evaluations)
+        return (observed_word, num_evaluations)
+
+    # Run fault simulation for every input vector with chosen engine ("deductive", "ppsfp", "event_driven" or "critical_path")
+    def run_fault_simulations_with_inputs(self, input_lines: list[str], reset_detection: bool, circuit_name: str, output_filepath: str = None, engine: str = "deductive", drop_detected_faults: bool = False):
+        assert self.netlist != None
+        if engine not in fault_simulation_engines:
+            print(f"Unknown fault simulation engine {engine}")
+            return None
+
+        # Keep one result writer open for the whole run, unless one is already open
+        is_result_writer_opened = (output_filepath != None and self.result_writer == None)
+        if is_result_writer_opened:
+            self.open_result_writer(output_filepath)
+        try:
+            match engine:
+                case "deductive":
+                    return [self.run_fault_simulation_with_input(input_line, reset_detection, circuit_name, output_filepath, drop_detected_faults) for input_line in input_lines]
+                case "critical_path":
+                    return [self.run_critical_path_tracing_with_input(input_line, reset_detection, circuit_name, output_filepath, drop_detected_faults) for input_line in input_lines]
+                case "event_driven":
+                    return [self.run_event_driven_fault_simulation_with_input(input_line, reset_detection, circuit_name, output_filepath, drop_detected_faults) for input_line in input_lines]
+                case "ppsfp":
+                    return self.run_ppsfp_fault_simulation_with_inputs(input_lines, reset_detection, circuit_name, output_filepath, drop_detected_faults)
+        finally:
+            if is_result_writer_opened:
+                self.close_result_writer()
+
+    # While result writer is open, every result written goes into it (whatever output_filepath is given) instead of text file opened for each input vector
+    # output_format is one of "text", "jsonl", "csv" and "binary"; with delta_only, cumulative results only list faults newly detected by each input vector
+    def open_result_writer(self, output_filepath: str, output_format: str = "text", delta_only: bool = False, echo: bool = True):
+        self.close_result_writer()
+        self.result_writer = create_result_writer(output_filepath, output_format, delta_only, echo)
+        self.result_writer.open()
+        return self.result_writer
+
+    def close_result_writer(self):
+        if self.result_writer != None:
+            self.result_writer.close()
+            self.result_writer = None
+
+    # Print detected faults and write them into file specified
+    def write_detected_faults(self, input_line: str, detected_faults: set, reset_detection: bool, circuit_name: str, output_filepath: str):
+        with profile_phase(self.profiler, "report"):
+            if self.result_writer != None:
+                self.result_writer.write_detected_faults(input_line, detected_faults, reset_detection, circuit_name)
+                return
             try:
-                with open(output_filepath, "a") as output_file:
-                    if reset_detection:
-                        print(f"Circuit: {circuit_name}   Input Vector: {" ".join(input_line)}\n\n------FAULTS DETECTED -----------")
-                        output_file.write(f"Circuit: {circuit_name}   Input Vector: {" ".join(input_line)}\n\n------FAULTS DETECTED -----------\n")
-                        for detected_fault in sorted_detected_faults:
-                            print(f"{detected_fault[0]:>5} stuck at  {detected_fault[1]}")
-                            output_file.write(f"{detected_fault[0]:>5} stuck at  {detected_fault[1]}\n")
-                        print(f"Number of faults detected: {len(sorted_detected_faults)}\n")
-                        output_file.write(f"Number of faults detected: {len(sorted_detected_faults)}\n\n")
-                    else:
-                        print(f"Circuit: {circuit_name}   Input Vector: {" ".join(input_line)}\n\n------ALL FAULTS DETECTED SO FAR -----------")
-                        output_file.write(f"Circuit: {circuit_name}   Input Vector: {" ".join(input_line)}\n\n------ALL FAULTS DETECTED SO FAR -----------\n")
-                        for detected_fault in sorted_detected_faults:
-                            print(f"{detected_fault[0]:>5} stuck at  {detected_fault[1]}")
-                            output_file.write(f"{detected_fault[0]:>5} stuck at  {detected_fault[1]}\n")
-                        print(f"Total number of faults detected so far: {len(sorted_detected_faults)}\n")
-                        output_file.write(f"Total number of faults detected so far: {len(sorted_detected_faults)}\n\n")
+                with create_result_writer(output_filepath) as result_writer:
+                    result_writer.write_detected_faults(input_line, detected_faults, reset_detection, circuit_name)
             except FileNotFoundError:
                 print(f"File {output_filepath} was not found!")
             except Exception as exception:
                 print(f"Exception occurred: {exception}")
-        
-        return detected_faults
 
+    # Count all placed stuck-at faults, including faults dropped from simulation or collapsed into representative faults
     def count_stuck_at_faults(self):
         assert self.netlist != None
-        count = 0
-        for net in self.netlist.nets_by_name.values():
-            count += len(net.stuck_at_values)
-        return count
\ No newline at end of file
+        return sum(len(fault_class) for fault_class in self.fault_classes_by_id)
\ No newline at end of file
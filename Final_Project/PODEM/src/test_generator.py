@@ -1,15 +1,76 @@
+import heapq
 import random
-from gate import GateType
+import time
+from enum import Enum
 from netlist import Netlist
+from compact_netlist import GateOperation, controlling_values_by_operation
+from profiler import profile_phase
 
+class PODEMOutcome(Enum):
+    VECTOR = "vector"
+    UNDETECTABLE = "undetectable"
+    ABORTED = "aborted"
+
+# D-frontier gates (by gate ID) kept in a heap ordered by priority, so the best gate is picked without scanning all of them
+# Gates removed from D-frontier stay in the heap until they reach its top
+class DFrontier:
+    def __init__(self, priority):
+        self.priority = priority
+        self.gates = set()
+        self.gates_heap = []
+
+    def __contains__(self, gate_id):
+        return gate_id in self.gates
+
+    def __len__(self):
+        return len(self.gates)
+
+    def __iter__(self):
+        return iter(self.gates)
+
+    def add(self, gate_id):
+        if gate_id not in self.gates:
+            self.gates.add(gate_id)
+            heapq.heappush(self.gates_heap, (self.priority(gate_id), gate_id))
+
+    def discard(self, gate_id):
+        self.gates.discard(gate_id)
+
+    def pick(self):
+        while self.gates_heap[0][1] not in self.gates:
+            heapq.heappop(self.gates_heap)
+        return self.gates_heap[0][1]
+
+# PODEM runs on compact netlist, with good and faulty values of nets (None for x) kept in lists indexed by net ID
 class TestGenerator:
-    def __init__(self):
+    # If backtrack_limit or time_limit (in seconds) is specified, PODEM aborts a fault once it exceeds the limit
+    def __init__(self, backtrack_limit: int = None, time_limit: float = None):
         self.netlist = None
+        self.compact_netlist = None
+        self.logic_values = []
+        self.faulty_values = []
+        self.is_fault_activated = None
         self.D_frontier = None
+        self.x_path_counts = []
+        self.has_x_path = []
+        self.trail = []
+        self.backtrack_limit = backtrack_limit
+        self.time_limit = time_limit
+        self.num_backtracks = 0
+        self.elapsed_time = 0
+        # Profiler recording test generation while profiling (None otherwise)
+        self.profiler = None
+
+    def build_netlist_from_file(self, netlist_filepath: str, use_cache: bool = False):
+        self.netlist = Netlist(self.profiler)
+        self.netlist.build_from_file(netlist_filepath, use_cache)
+        self.compact_netlist = self.netlist.get_compact_netlist()
+        return self.netlist
 
-    def build_netlist_from_file(self, netlist_filepath: str):
-        self.netlist = Netlist()
-        self.netlist.build_from_file(netlist_filepath)
+    # Generate tests for netlist already built (for example by fault simulator), instead of building it again from file
+    def load_netlist(self, netlist: Netlist):
+        self.netlist = netlist
+        self.compact_netlist = netlist.get_compact_netlist()
         return self.netlist
 
 
@@ -17,166 +78,332 @@ class TestGenerator:
         return ''.join(random_gen.choice("01") for _ in range(size))
     
 
-    def objective_PODEM(self, faulty_net, stuck_at_value):
-        if (faulty_net.is_fault_activated == None):
-            return (faulty_net, int(not stuck_at_value))
+    def is_x(self, net_id: int):
+        return (self.logic_values[net_id] == None and self.faulty_values[net_id] == None)
+
+    # Net carries D or Db if its good and faulty values are known and differ
+    def is_D(self, net_id: int):
+        logic_value = self.logic_values[net_id]
+        faulty_value = self.faulty_values[net_id]
+        return (logic_value != None and faulty_value != None and logic_value != faulty_value)
+
+    def objective_PODEM(self, faulty_net_id: int, stuck_at_value: int):
+        if (self.is_fault_activated == None):
+            return (faulty_net_id, int(not stuck_at_value))
         
-        D_gate = list(self.D_frontier)[0]
-        for in_net in D_gate.in_nets:
-            if (in_net.logic_value == None and in_net.faulty_value == None):
-                match D_gate.gate_type:
-                    case GateType.XOR | GateType.XNOR:
-                        return (in_net, D_gate.has_inversion)
-                    case _:
-                        return (in_net, int(not D_gate.controlling_values[0]))
-        return None
+        # Propagate through D-frontier gate that is easiest to observe
+        # Every other input net of that gate must be set to non-controlling value, so set the hardest one first
+        D_gate_id = self.D_frontier.pick()
+        x_in_net_ids = [in_net_id for in_net_id in self.compact_netlist.get_fanin(D_gate_id) if self.is_x(in_net_id)]
+        if (len(x_in_net_ids) == 0):
+            return None
+        match self.compact_netlist.gate_operations[D_gate_id]:
+            case GateOperation.XOR:
+                return (x_in_net_ids[0], self.compact_netlist.gate_inversions[D_gate_id])
+            case operation:
+                non_controlling_value = int(not controlling_values_by_operation[operation][0])
+                controllabilities = self.compact_netlist.controllabilities
+                return (max(x_in_net_ids, key = lambda in_net_id: controllabilities[2 * in_net_id + non_controlling_value]), non_controlling_value)
 
     def backtrace_PODEM(self, objective):
-        (current_net, current_value) = objective
-        while (current_net.src_gate != None):
-            current_gate = current_net.src_gate
-            (current_net, current_value) = current_gate.backtrace(current_value)
-        return (current_net, current_value)
+        (current_net_id, current_value) = objective
+        while (self.compact_netlist.src_gate_ids[current_net_id] != -1):
+            current_gate_id = self.compact_netlist.src_gate_ids[current_net_id]
+            (current_net_id, current_value) = self.compact_netlist.backtrace(current_gate_id, current_value, self.logic_values, self.faulty_values)
+        return (current_net_id, current_value)
+
+    # Change values of net, recording old values on trail so that backtracking can restore them
+    def assign_net_PODEM(self, net_id: int, logic_value, faulty_value):
+        self.trail.append(("net", net_id, (self.logic_values[net_id], self.faulty_values[net_id])))
+        self.logic_values[net_id] = logic_value
+        self.faulty_values[net_id] = faulty_value
+        self.update_x_paths_PODEM(net_id)
+
+    def set_fault_activation_PODEM(self, is_fault_activated):
+        if (self.is_fault_activated != is_fault_activated):
+            self.trail.append(("activation", None, self.is_fault_activated))
+            self.is_fault_activated = is_fault_activated
+
+    # Gate is in D-frontier if its output net is x and one of its input nets is D/Db
+    def update_D_frontier_PODEM(self, gate_id: int):
+        (logic_values, faulty_values) = (self.logic_values, self.faulty_values)
+        is_in_D_frontier = False
+        out_net_id = self.compact_netlist.out_net_ids[gate_id]
+        if (logic_values[out_net_id] == None and faulty_values[out_net_id] == None):
+            for in_net_id in self.compact_netlist.get_fanin(gate_id):
+                if (logic_values[in_net_id] != None and faulty_values[in_net_id] != None and logic_values[in_net_id] != faulty_values[in_net_id]):
+                    is_in_D_frontier = True
+                    break
+        if (is_in_D_frontier != (gate_id in self.D_frontier)):
+            self.trail.append(("D_frontier", gate_id, not is_in_D_frontier))
+            if is_in_D_frontier:
+                self.D_frontier.add(gate_id)
+            else:
+                self.D_frontier.discard(gate_id)
+
+    # Undo every change recorded on trail after trail had trail_size entries
+    def undo_PODEM(self, trail_size: int):
+        while len(self.trail) > trail_size:
+            (change_type, changed_id, old_value) = self.trail.pop()
+            match change_type:
+                case "net":
+                    (self.logic_values[changed_id], self.faulty_values[changed_id]) = old_value
+                    self.update_x_paths_PODEM(changed_id)
+                case "activation":
+                    self.is_fault_activated = old_value
+                case "D_frontier":
+                    if old_value:
+                        self.D_frontier.add(changed_id)
+                    else:
+                        self.D_frontier.discard(changed_id)
+
+    def imply_PODEM(self, input_net_id: int, assigned_value: int, faulty_net_id: int, stuck_at_value: int):
+        compact_netlist = self.compact_netlist
 
-    def imply_PODEM(self, input_net, assigned_value, faulty_net, stuck_at_value):
         # Just activate (already assign) if input net is faulty net
-        if (input_net.name == faulty_net.name):
-            faulty_net.is_fault_activated = True
+        if (input_net_id == faulty_net_id):
+            self.set_fault_activation_PODEM(True)
         else:
-            input_net.logic_value = assigned_value
-            input_net.faulty_value = assigned_value
+            self.assign_net_PODEM(input_net_id, assigned_value, assigned_value)
 
-        # Create stack of gates for evaluation
-        gates_stack = []
+        # Create event queue of gates ordered by level, so each gate is evaluated once after all its input nets settle
+        gates_heap = []
+        scheduled_gates = set()
+        for des_gate_id in compact_netlist.get_fanout(input_net_id):
+            if des_gate_id not in scheduled_gates:
+                scheduled_gates.add(des_gate_id)
+                heapq.heappush(gates_heap, (compact_netlist.levels[des_gate_id], des_gate_id))
 
-        for des_gate in input_net.des_gates:
-            gates_stack.append(des_gate)
-
-        # While stack still has gate(s) remaining
-        while len(gates_stack) > 0:
-            # Pop gate from stack
-            gate = gates_stack.pop()
+        # While event queue still has gate(s) remaining
+        while len(gates_heap) > 0:
+            (_, gate_id) = heapq.heappop(gates_heap)
+            out_net_id = compact_netlist.out_net_ids[gate_id]
 
             # Evaluate gate to find corresponding values for output net
-            (logic_value, faulty_value) = gate.evaluate_verbose_with_possible_fault()
-            is_output_changed = (logic_value != gate.out_net.logic_value or faulty_value != gate.out_net.faulty_value)
+            (logic_value, faulty_value) = compact_netlist.evaluate_with_possible_fault(gate_id, self.logic_values, self.faulty_values)
+            is_output_changed = (logic_value != self.logic_values[out_net_id] or faulty_value != self.faulty_values[out_net_id])
 
             # Handle if gate's output net is faulty net
-            if (gate.out_net.name == faulty_net.name):
+            if (out_net_id == faulty_net_id):
                 if (logic_value == None):
                     is_output_changed = False
-                    faulty_net.is_fault_activated = None
+                    self.set_fault_activation_PODEM(None)
                 elif (logic_value == stuck_at_value):
-                    faulty_net.is_fault_activated = False
-                    return
+                    self.set_fault_activation_PODEM(False)
+                    break
                 else:
-                    faulty_net.is_fault_activated = True
+                    self.set_fault_activation_PODEM(True)
             
+            # Faulty net should keep D / Db instead of taking in 0 or 1
+            if is_output_changed and (out_net_id != faulty_net_id):
+                self.assign_net_PODEM(out_net_id, logic_value, faulty_value)
+
+            # Input nets (and maybe output net) of gate changed, so its D-frontier membership may change
+            self.update_D_frontier_PODEM(gate_id)
+
             if is_output_changed:
-                # Faulty net should keep D / Db instead of taking in 0 or 1
-                if (gate.out_net.name != faulty_net.name):
-                    gate.out_net.logic_value = logic_value
-                    gate.out_net.faulty_value = faulty_value
-
-                is_D_or_Db_created = False
-                if (gate.out_net.logic_value != None and gate.out_net.faulty_value != None):
-                    self.D_frontier.discard(gate)
-                    is_D_or_Db_created = (gate.out_net.logic_value == int(not gate.out_net.faulty_value))
-
-                for des_gate in gate.out_net.des_gates:
-                    # If gate has output x and an input D/Db, add gate to D-frontier
-                    if (is_D_or_Db_created and des_gate.out_net.logic_value == None and des_gate.out_net.faulty_value == None):
-                        self.D_frontier.add(des_gate)
-                    # Push gate onto stack
-                    gates_stack.append(des_gate)
+                for des_gate_id in compact_netlist.get_fanout(out_net_id):
+                    if des_gate_id not in scheduled_gates:
+                        scheduled_gates.add(des_gate_id)
+                        heapq.heappush(gates_heap, (compact_netlist.levels[des_gate_id], des_gate_id))
+
+        # Gates scheduled but left in event queue are not evaluated
+        if self.profiler != None:
+            self.profiler.count("implications")
+            self.profiler.count("gate_evaluations", len(scheduled_gates) - len(gates_heap))
+
+    # Net has x-path if it is x and it is netlist's output net or input net of gate whose output net has x-path
+    # x_path_counts keeps, for each net, number of such output nets and destination gates, so x-paths can be updated incrementally
+    def initialize_x_paths_PODEM(self):
+        compact_netlist = self.compact_netlist
+        x_path_counts = [0] * compact_netlist.num_nets
+        has_x_path = [False] * compact_netlist.num_nets
+        (logic_values, faulty_values) = (self.logic_values, self.faulty_values)
+        for output_net_id in compact_netlist.output_net_ids:
+            x_path_counts[output_net_id] += 1
+
+        # Visit output nets of gates from the highest level, so counts of a net are complete when it is visited
+        # Nets not driven by any gate have no fan-in cone to update
+        for gate_id in reversed(compact_netlist.levelized_gate_ids):
+            net_id = compact_netlist.out_net_ids[gate_id]
+            if (logic_values[net_id] == None and faulty_values[net_id] == None and x_path_counts[net_id] > 0):
+                has_x_path[net_id] = True
+                for in_net_id in compact_netlist.get_fanin(gate_id):
+                    x_path_counts[in_net_id] += 1
+        for (net_id, src_gate_id) in enumerate(compact_netlist.src_gate_ids):
+            if (src_gate_id == -1):
+                has_x_path[net_id] = (logic_values[net_id] == None and faulty_values[net_id] == None and x_path_counts[net_id] > 0)
+        (self.x_path_counts, self.has_x_path) = (x_path_counts, has_x_path)
 
+    # Values of net changed, so update x-paths of net and, only where x-path status flips, of nets in its fan-in cone
+    def update_x_paths_PODEM(self, net_id: int):
+        (src_gate_ids, logic_values, faulty_values, x_path_counts) = (self.compact_netlist.src_gate_ids, self.logic_values, self.faulty_values, self.x_path_counts)
+        net_ids_stack = [net_id]
+        while len(net_ids_stack) > 0:
+            current_net_id = net_ids_stack.pop()
+            has_x_path = (logic_values[current_net_id] == None and faulty_values[current_net_id] == None and x_path_counts[current_net_id] > 0)
+            if (has_x_path == self.has_x_path[current_net_id]):
+                continue
+            self.has_x_path[current_net_id] = has_x_path
+            src_gate_id = src_gate_ids[current_net_id]
+            if (src_gate_id != -1):
+                for in_net_id in self.compact_netlist.get_fanin(src_gate_id):
+                    x_path_counts[in_net_id] += 1 if has_x_path else -1
+                    net_ids_stack.append(in_net_id)
+
+    # There is x-path from D/Db to output only if output net of some gate in D-frontier has x-path
     def has_no_x_path_PODEM(self):
-        gates_set = set()
-        
-        for output_net in self.netlist.output_nets:
-            if (output_net.src_gate != None and output_net.logic_value == None and output_net.faulty_value == None):
-                gates_set.add(output_net.src_gate)
-
-        while (len(gates_set) > 0):
-            gate = gates_set.pop()
-            for in_net in gate.in_nets:
-                if (in_net.logic_value == None and in_net.faulty_value == None):
-                    if (in_net.src_gate != None):
-                        gates_set.add(in_net.src_gate)
-                elif (in_net.logic_value == int(not in_net.faulty_value)):
-                    return False
+        for gate_id in self.D_frontier:
+            if self.has_x_path[self.compact_netlist.out_net_ids[gate_id]]:
+                return False
         return True
 
-    def run_PODEM(self, faulty_net, stuck_at_value):
+    # Return True if test is found, False if current assignment can't lead to a test, None if more decisions are needed
+    def check_PODEM(self):
+        is_propagated = False
+        for output_net_id in self.compact_netlist.output_net_ids:
+            if self.is_D(output_net_id):
+                is_propagated = True
+                break
+
         # If faulty net is activated and fault's effect is propagated to netlist's output net, PODEM succeeds
-        if (faulty_net.is_fault_activated == True):
-            for net in self.netlist.output_nets:
-                if (net.logic_value != None and net.faulty_value != None and net.logic_value == int(not net.faulty_value)):
-                    return True
+        if (self.is_fault_activated == True and is_propagated):
+            return True
             
         # If fault can't be activated (even if fault is at output), PODEM fails
-        if (faulty_net.is_fault_activated == False):
+        if (self.is_fault_activated == False):
             return False
         
-        # If fault is not at output net, then if D-frontier is empty or there is no x-path to output, PODEM fails
-        if (len(faulty_net.des_gates) > 0):
+        # If fault's effect is not at output net yet, then if D-frontier is empty or there is no x-path to output, PODEM fails
+        # Fault's effect may already be at output before fault is activated, then only activation is left
+        if (not is_propagated):
             if (len(self.D_frontier) == 0 or self.has_no_x_path_PODEM()):
                 return False
+        return None
 
-        objective = self.objective_PODEM(faulty_net, stuck_at_value)
-        if objective != None:
-            (input_net, assigned_value) = self.backtrace_PODEM(objective)
+    # PODEM with explicit stack of decisions on input nets
+    # Each decision is [input net ID, assigned value, whether other value was tried, trail size before decision]
+    def run_PODEM(self, faulty_net_id: int, stuck_at_value: int):
+        start_time = time.perf_counter()
+        decisions_stack = []
 
-            self.imply_PODEM(input_net, assigned_value, faulty_net, stuck_at_value)
-            if (self.run_PODEM(faulty_net, stuck_at_value)):
-                return True
-            
-            self.imply_PODEM(input_net, int(not assigned_value), faulty_net, stuck_at_value)
-            if (self.run_PODEM(faulty_net, stuck_at_value)):
-                return True
-            
-            self.imply_PODEM(input_net, None, faulty_net, stuck_at_value)
-        return False
+        while True:
+            if self.profiler != None:
+                self.profiler.record_D_frontier_size(len(self.D_frontier))
+            result = self.check_PODEM()
+            if result == True:
+                return PODEMOutcome.VECTOR
+
+            if result == None:
+                objective = self.objective_PODEM(faulty_net_id, stuck_at_value)
+                if objective != None:
+                    (input_net_id, assigned_value) = self.backtrace_PODEM(objective)
+                    decisions_stack.append([input_net_id, assigned_value, False, len(self.trail)])
+                    self.imply_PODEM(input_net_id, assigned_value, faulty_net_id, stuck_at_value)
+                    continue
+
+            # Backtrack: try other value of most recent decision not tried both ways, undo decisions tried both ways
+            while len(decisions_stack) > 0 and decisions_stack[-1][2]:
+                (_, _, _, trail_size) = decisions_stack.pop()
+                self.undo_PODEM(trail_size)
+            if len(decisions_stack) == 0:
+                return PODEMOutcome.UNDETECTABLE
+
+            self.num_backtracks += 1
+            if (self.backtrack_limit != None and self.num_backtracks > self.backtrack_limit) or (self.time_limit != None and time.perf_counter() - start_time > self.time_limit):
+                return PODEMOutcome.ABORTED
+
+            # Restore only nets changed by previous value of decision, then imply other value
+            decision = decisions_stack[-1]
+            self.undo_PODEM(decision[3])
+            decision[1] = int(not decision[1])
+            decision[2] = True
+            self.imply_PODEM(decision[0], decision[1], faulty_net_id, stuck_at_value)
     
-    def generate_test_vector_by_PODEM(self, faulty_net_name: int, stuck_at_value: int, circuit_name: str, output_filepath: str):
+    def generate_test_vector_by_PODEM(self, faulty_net_name: int, stuck_at_value: int, circuit_name: str, output_filepath: str, keep_dont_cares: bool = False):
         assert self.netlist != None
 
+        if not self.is_valid_fault(faulty_net_name, stuck_at_value):
+            return
+
+        (outcome, test_vector) = self.find_test_vector_by_PODEM(faulty_net_name, stuck_at_value, keep_dont_cares = keep_dont_cares)
+        with profile_phase(self.profiler, "report"):
+            self.write_test_vector(faulty_net_name, stuck_at_value, outcome, test_vector, self.num_backtracks, circuit_name, output_filepath)
+        return test_vector
+
+    def is_valid_fault(self, faulty_net_name: int, stuck_at_value: int):
         if stuck_at_value not in [0, 1]:
             print(f"Invalid stuck-at value {stuck_at_value}")
-            return
+            return False
 
-        faulty_net = self.netlist.nets_by_name.get(faulty_net_name)
-        if (faulty_net == None):
+        if (self.compact_netlist.get_net_id(faulty_net_name) == None):
             print(f"Invalid net {faulty_net_name}")
-            return
+            return False
+        return True
+
+    # Return PODEM outcome for stuck-at fault and test vector (None if the fault is undetectable or PODEM aborted)
+    # Number of backtracks and time in seconds spent for the fault are kept in num_backtracks and elapsed_time
+    # If input_assignment is specified (X for unassigned input nets), PODEM only searches test vectors keeping its assigned bits,
+    # and UNDETECTABLE means the fault is undetectable under that assignment
+    # If keep_dont_cares is specified, input nets PODEM left unassigned stay X in test vector instead of 0
+    def find_test_vector_by_PODEM(self, faulty_net_name: int, stuck_at_value: int, input_assignment: str = None, keep_dont_cares: bool = False):
+        start_time = time.perf_counter()
+        compact_netlist = self.compact_netlist
+        faulty_net_id = compact_netlist.get_net_id(faulty_net_name)
+
+        self.num_backtracks = 0
+        self.trail = []
+        self.D_frontier = DFrontier(lambda gate_id: compact_netlist.observabilities[compact_netlist.out_net_ids[gate_id]])
+        self.is_fault_activated = None
+        self.logic_values = [None] * compact_netlist.num_nets
+        self.faulty_values = [None] * compact_netlist.num_nets
 
-        self.D_frontier = set()
-        faulty_net.is_fault_activated = None
-        for net in self.netlist.nets_by_name.values():
-            net.logic_value = None
-            net.faulty_value = None
+        self.logic_values[faulty_net_id] = int(not stuck_at_value)
+        self.faulty_values[faulty_net_id] = stuck_at_value
+        for des_gate_id in compact_netlist.get_fanout(faulty_net_id):
+            self.D_frontier.add(des_gate_id)
+        self.initialize_x_paths_PODEM()
 
-        faulty_net.logic_value = int(not stuck_at_value)
-        faulty_net.faulty_value = stuck_at_value
-        self.D_frontier.update(faulty_net.des_gates)
+        with profile_phase(self.profiler, "generate"):
+            # Imply assigned bits before any decision, so backtracking never changes them
+            if input_assignment != None:
+                for (input_net_id, value) in zip(compact_netlist.input_net_ids, input_assignment):
+                    if (value == "X" or self.is_fault_activated == False):
+                        continue
+                    if (input_net_id == faulty_net_id and int(value) == stuck_at_value):
+                        self.set_fault_activation_PODEM(False)
+                    else:
+                        self.imply_PODEM(input_net_id, int(value), faulty_net_id, stuck_at_value)
 
+            outcome = self.run_PODEM(faulty_net_id, stuck_at_value)
+        self.elapsed_time = time.perf_counter() - start_time
+        if self.profiler != None:
+            self.profiler.count("PODEM_calls")
+            self.profiler.count("backtracks", self.num_backtracks)
+        if (outcome == PODEMOutcome.VECTOR):
+            test_vector = ""
+            for input_net_id in compact_netlist.input_net_ids:
+                if (self.logic_values[input_net_id] != None):
+                    test_vector = test_vector + str(self.logic_values[input_net_id])
+                else:
+                    test_vector = test_vector + ("X" if keep_dont_cares else "0")
+            return (outcome, test_vector)
+        return (outcome, None)
+
+    # Print test generation result for stuck-at fault and write it into file specified
+    def write_test_vector(self, faulty_net_name: int, stuck_at_value: int, outcome: PODEMOutcome, test_vector: str, num_backtracks: int, circuit_name: str, output_filepath: str):
         with open(output_filepath, "a") as output_file:
             print(f"Circuit: {circuit_name}   Input fault: Net {faulty_net_name} s-a-{stuck_at_value}\n")
             output_file.write(f"Circuit: {circuit_name}   Input fault: Net {faulty_net_name} s-a-{stuck_at_value}\n\n")
-            if (self.run_PODEM(faulty_net, stuck_at_value)):
-                print("Test vector generated: ", end='')
-                output_file.write("Test vector generated: ")
-                test_vector = ""
-                
-                for input_net in self.netlist.input_nets:
-                    input_net_value = input_net.logic_value if input_net.logic_value != None else 0
-                    print(f"{input_net_value}", end='')
-                    output_file.write(f"{input_net_value}")
-                    test_vector = test_vector + str(input_net_value)
-                print("\n")
-                output_file.write("\n\n")
-                return test_vector
-            else:
-                print("The fault is undetectable\n")
-                output_file.write("The fault is undetectable\n\n")
-                return None
\ No newline at end of file
+            match outcome:
+                case PODEMOutcome.VECTOR:
+                    print(f"Test vector generated: {test_vector}")
+                    output_file.write(f"Test vector generated: {test_vector}\n")
+                case PODEMOutcome.UNDETECTABLE:
+                    print("The fault is undetectable")
+                    output_file.write("The fault is undetectable\n")
+                case PODEMOutcome.ABORTED:
+                    print("Test generation aborted")
+                    output_file.write("Test generation aborted\n")
+            print(f"Number of backtracks: {num_backtracks}\n")
+            output_file.write(f"Number of backtracks: {num_backtracks}\n\n")
\ No newline at end of file